@@ -0,0 +1,47 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:22
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+import django.db.models.deletion
+
+
+def fill_collection_summary(apps, schema_editor):
+    Collection      = apps.get_model('account', 'Collection')
+    PhotoCollection = apps.get_model('photo', 'PhotoCollection')
+
+    summaries = PhotoCollection.objects.filter(
+        collection_id__isnull = False,
+        photo_id__isnull      = False
+    ).values('collection_id').annotate(count=Count('id'), cover=Min('photo_id'))
+    for summary in summaries:
+        Collection.objects.filter(id=summary['collection_id']).update(
+            photo_count    = summary['count'],
+            cover_photo_id = summary['cover']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photo', '0002_timeline'),
+        ('account', '0003_auto_20200814_1421'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='cover_photo',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cover_collection', to='photo.Photo'),
+        ),
+        migrations.AddField(
+            model_name='collection',
+            name='photo_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='collection',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(fill_collection_summary, migrations.RunPython.noop),
+    ]
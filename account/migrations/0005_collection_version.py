@@ -0,0 +1,18 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_collection_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
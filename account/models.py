@@ -48,6 +48,10 @@ class Collection(models.Model):
     name        = models.CharField(max_length=50, null=False, unique=True)
     description = models.CharField(max_length=500, null=True)
     private     = models.BooleanField(default=False)
+    photo_count = models.IntegerField(default=0)
+    cover_photo = models.ForeignKey('photo.Photo', on_delete=models.SET_NULL, null=True, related_name='cover_collection')
+    updated_at  = models.DateTimeField(auto_now=True)
+    version     = models.IntegerField(default=0)
 
     class Meta:
         db_table = 'collections'
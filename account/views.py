@@ -9,6 +9,7 @@ from django.db.models       import Q
 from auth           import login_check
 from my_settings    import SECRET_KEY, ALGORITHM
 from photo.models   import Photo
+from photo.tasks    import update_timeline
 from account.models import (
     User,
     UserInterest,
@@ -164,7 +165,7 @@ class FollowingView(View):
                         from_user_id = user_id,
                         to_user_id   = data['user_id']
                     )
-                    return JsonResponse({'status':follow.status}, status=200)
+                update_timeline.delay(user_id, data['user_id'], follow.status)
                 return JsonResponse({'status':follow.status}, status=200)
             return JsonResponse({'message':'INVALID_USER'}, status=401)
         except KeyError:
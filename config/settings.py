@@ -140,6 +140,27 @@ CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'flush-photo-views' : {
+        'task'     : 'flush_photo_views',
+        'schedule' : 60.0
+    },
+    'flush-photo-downloads' : {
+        'task'     : 'flush_photo_downloads',
+        'schedule' : 60.0
+    },
+    'rebuild-tag-cooccurrence' : {
+        'task'     : 'rebuild_tag_cooccurrence',
+        'schedule' : 60.0 * 60 * 24
+    }
+}
+
+S3_TRANSFER = {
+    'max_pool_connections' : 50,
+    'multipart_threshold'  : 8 * 1024 * 1024,
+    'multipart_chunksize'  : 8 * 1024 * 1024,
+    'max_concurrency'      : 10
+}
 
 CACHES = {
     "default" : {
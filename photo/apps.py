@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PhotoConfig(AppConfig):
     name = 'photo'
+
+    def ready(self):
+        from . import signals
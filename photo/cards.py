@@ -0,0 +1,66 @@
+from django.core.cache import cache
+
+from .models      import Photo
+from .derivatives import build_srcset
+
+CARD_TIMEOUT     = 60 * 60 * 24
+CARD_VERSION     = 2
+CARD_HITS_KEY    = 'photo_card_hits'
+CARD_MISSES_KEY  = 'photo_card_misses'
+
+def card_key(photo_id):
+    return f'photo_card_{CARD_VERSION}_{photo_id}'
+
+def build_card(photo):
+    return {
+        "id"                 : photo.id,
+        "image"              : photo.image,
+        "location"           : photo.location,
+        "user_first_name"    : photo.user.first_name,
+        "user_last_name"     : photo.user.last_name,
+        "user_name"          : photo.user.user_name,
+        "user_profile_image" : photo.user.profile_image,
+        "width"              : photo.width,
+        "height"             : photo.height,
+        "srcset"             : build_srcset(photo.image, photo.derivatives)
+    }
+
+def incr_counter(key, delta):
+    if not delta:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.set(key, delta, None)
+
+def get_cards(photo_ids):
+    cached = cache.get_many([card_key(photo_id) for photo_id in photo_ids])
+    cards  = {photo_id : cached[card_key(photo_id)] for photo_id in photo_ids if card_key(photo_id) in cached}
+    misses = [photo_id for photo_id in photo_ids if photo_id not in cards]
+
+    if misses:
+        photos = Photo.objects.select_related("user").in_bulk(misses)
+        fresh  = {photo_id : build_card(photo) for photo_id, photo in photos.items()}
+        cache.set_many({card_key(photo_id) : card for photo_id, card in fresh.items()}, CARD_TIMEOUT)
+        cards.update(fresh)
+
+    incr_counter(CARD_HITS_KEY, len(photo_ids) - len(misses))
+    incr_counter(CARD_MISSES_KEY, len(misses))
+    return [cards[photo_id] for photo_id in photo_ids if photo_id in cards]
+
+def get_card_stats():
+    counters = cache.get_many([CARD_HITS_KEY, CARD_MISSES_KEY])
+    hits     = counters.get(CARD_HITS_KEY, 0)
+    misses   = counters.get(CARD_MISSES_KEY, 0)
+    return {
+        "hits"     : hits,
+        "misses"   : misses,
+        "hit_rate" : hits / (hits + misses) if hits + misses else 0
+    }
+
+def invalidate_cards(photo_ids):
+    cache.delete_many([card_key(photo_id) for photo_id in photo_ids])
+
+def hydrate_photos(photo_ids, *related):
+    photos = Photo.objects.select_related(*related).in_bulk(photo_ids)
+    return [photos[photo_id] for photo_id in photo_ids if photo_id in photos]
@@ -0,0 +1,115 @@
+import uuid
+from array import array
+
+from django_redis import get_redis_connection
+
+from .models     import PhotoCollection
+from .pagination import (
+    paginate,
+    encode_cursor,
+    decode_cursor
+)
+
+CATEGORY_OWNER = 'weplash'
+BUILD_TIMEOUT  = 60
+BUILD_BATCH    = 5000
+SENTINEL       = 0
+
+UPDATE_FEED = """
+if redis.call('exists', KEYS[1]) == 0 then
+    redis.call('del', KEYS[2])
+    return 0
+end
+for index = 2, #ARGV do
+    if ARGV[1] == 'add' then
+        redis.call('zadd', KEYS[1], ARGV[index], ARGV[index])
+    else
+        redis.call('zrem', KEYS[1], ARGV[index])
+    end
+end
+return 1
+"""
+
+COMMIT_FEED = """
+if redis.call('get', KEYS[3]) ~= ARGV[1] then
+    redis.call('del', KEYS[2])
+    return 0
+end
+redis.call('rename', KEYS[2], KEYS[1])
+redis.call('del', KEYS[3])
+return 1
+"""
+
+def category_feed_key(name):
+    return f'category_feed_{name}'
+
+def category_build_key(name):
+    return f'category_feed_build_{name}'
+
+def category_queryset(name):
+    return PhotoCollection.objects.filter(
+        collection__user__user_name = CATEGORY_OWNER,
+        collection__name            = name,
+        photo_id__isnull            = False
+    )
+
+def build_category_feed(name):
+    redis = get_redis_connection('default')
+    token = uuid.uuid4().hex
+    if not redis.set(category_build_key(name), token, nx=True, ex=BUILD_TIMEOUT):
+        return False
+
+    temp_key  = f'{category_feed_key(name)}_{token}'
+    photo_ids = list(category_queryset(name).order_by('photo_id').values_list('photo_id', flat=True).distinct())
+    pipe      = redis.pipeline()
+    pipe.zadd(temp_key, {SENTINEL : SENTINEL})
+    for start in range(0, len(photo_ids), BUILD_BATCH):
+        pipe.zadd(temp_key, {photo_id : photo_id for photo_id in photo_ids[start:start+BUILD_BATCH]})
+    pipe.expire(temp_key, BUILD_TIMEOUT)
+    pipe.execute()
+    return bool(redis.eval(COMMIT_FEED, 3, category_feed_key(name), temp_key, category_build_key(name), token))
+
+def ensure_category_feed(name):
+    if get_redis_connection('default').exists(category_feed_key(name)):
+        return True
+    return build_category_feed(name)
+
+def update_category_feed(name, added_ids=(), removed_ids=()):
+    redis = get_redis_connection('default')
+    keys  = (category_feed_key(name), category_build_key(name))
+    if added_ids:
+        redis.eval(UPDATE_FEED, 2, *keys, 'add', *added_ids)
+    if removed_ids:
+        redis.eval(UPDATE_FEED, 2, *keys, 'remove', *removed_ids)
+
+def get_category_feed(name):
+    if not ensure_category_feed(name):
+        return array('q', category_queryset(name).order_by('photo_id').values_list('photo_id', flat=True).distinct())
+    return array('q', map(int, get_redis_connection('default').zrangebyscore(
+        category_feed_key(name), f'({SENTINEL}', '+inf'
+    )))
+
+def get_category_page(name, offset, limit, after=None):
+    if not ensure_category_feed(name):
+        entries, next_cursor = paginate(
+            category_queryset(name).order_by('-photo_id'),
+            offset,
+            limit,
+            after,
+            key = 'photo_id'
+        )
+        return [entry.photo_id for entry in entries], next_cursor
+
+    redis = get_redis_connection('default')
+    if after is None:
+        return [int(photo_id) for photo_id in redis.zrevrangebyscore(
+            category_feed_key(name), '+inf', f'({SENTINEL}', start=offset*limit, num=limit
+        )], None
+
+    high      = f'({decode_cursor(after)}' if after else '+inf'
+    photo_ids = [int(photo_id) for photo_id in redis.zrevrangebyscore(
+        category_feed_key(name), high, f'({SENTINEL}', start=0, num=limit+1
+    )]
+    if len(photo_ids) > limit:
+        return photo_ids[:limit], encode_cursor(photo_ids[limit-1])
+    return photo_ids, None
@@ -0,0 +1,34 @@
+import json
+
+from django.db    import transaction
+from django_redis import get_redis_connection
+
+LOG_SEQ_KEY = 'change_log_seq'
+LOG_KEY     = 'change_log'
+LOG_LIMIT   = 10000
+
+READ_LOG = """
+local seq    = tonumber(redis.call('get', KEYS[1]) or '0')
+local needed = seq - tonumber(ARGV[1])
+if needed <= 0 or needed > tonumber(ARGV[2]) then
+    return {seq, {}, needed}
+end
+return {seq, redis.call('lrange', KEYS[2], -needed, -1), needed}
+"""
+
+def log_change(op, photo_id=0, tag_id=0, name=''):
+    entry = json.dumps([op, photo_id, tag_id, name])
+
+    def push():
+        pipe = get_redis_connection('default').pipeline(transaction=True)
+        pipe.incr(LOG_SEQ_KEY)
+        pipe.rpush(LOG_KEY, entry)
+        pipe.ltrim(LOG_KEY, -LOG_LIMIT, -1)
+        pipe.execute()
+    transaction.on_commit(push)
+
+def log_seq():
+    return int(get_redis_connection('default').get(LOG_SEQ_KEY) or 0)
+
+def read_log(seq):
+    return get_redis_connection('default').eval(READ_LOG, 2, LOG_SEQ_KEY, LOG_KEY, seq, LOG_LIMIT)
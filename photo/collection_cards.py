@@ -0,0 +1,59 @@
+from django.db                  import connection
+from django.db.models           import (
+    F,
+    Window
+)
+from django.db.models.functions import RowNumber
+
+from .models      import (
+    PhotoCollection,
+    PhotoHashTag
+)
+from .derivatives import build_srcset
+
+def get_preview_images(collection_ids, limit):
+    ranked = PhotoCollection.objects.filter(
+        collection_id__in = collection_ids,
+        photo_id__isnull  = False
+    ).annotate(preview_rank=Window(
+        expression   = RowNumber(),
+        partition_by = [F('collection_id')],
+        order_by     = F('photo_id').asc()
+    )).values_list('collection_id', 'photo__image', 'photo__derivatives', 'preview_rank')
+
+    sql, params = ranked.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT * FROM ({sql}) ranked WHERE ranked.preview_rank <= %s', [*params, limit])
+        rows = cursor.fetchall()
+
+    images = {}
+    for collection_id, image, derivatives, preview_rank in sorted(rows, key=lambda row: (row[0], row[3])):
+        images.setdefault(collection_id, []).append((image, derivatives))
+    return images
+
+def get_cover_tags(photo_ids, limit):
+    tags = {}
+    for photo_id, name in PhotoHashTag.objects.filter(
+        photo_id__in       = photo_ids,
+        hashtag_id__isnull = False
+    ).order_by('id').values_list('photo_id', 'hashtag__name'):
+        photo_tags = tags.setdefault(photo_id, [])
+        if len(photo_tags) < limit:
+            photo_tags.append(name)
+    return tags
+
+def build_collection_cards(collections, limit):
+    collections = list(collections)
+    images      = get_preview_images([collection.id for collection in collections], limit)
+    tags        = get_cover_tags([collection.cover_photo_id for collection in collections if collection.cover_photo_id], limit)
+
+    return [{
+        "id"              : collection.id,
+        "image"           : [image for image, _ in images.get(collection.id, [])],
+        "srcset"          : [build_srcset(image, derivatives) for image, derivatives in images.get(collection.id, [])],
+        "name"            : collection.name,
+        "photos_number"   : collection.photo_count,
+        "user_first_name" : collection.user.first_name,
+        "user_last_name"  : collection.user.last_name,
+        "tags"            : tags.get(collection.cover_photo_id, [])
+    } for collection in collections]
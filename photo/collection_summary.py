@@ -0,0 +1,70 @@
+from django.db.models import (
+    Case,
+    When,
+    Value,
+    F,
+    Min,
+    Count
+)
+from django.utils     import timezone
+
+from account.models import Collection
+
+from .models import PhotoCollection
+
+def add_to_summary(collection_id, photo_id):
+    Collection.objects.filter(id=collection_id).update(
+        photo_count    = F('photo_count') + 1,
+        cover_photo_id = Case(
+            When(cover_photo_id__isnull=True, then=Value(photo_id)),
+            When(cover_photo_id__gt=photo_id, then=Value(photo_id)),
+            default = F('cover_photo_id')
+        ),
+        updated_at     = timezone.now(),
+        version        = F('version') + 1
+    )
+
+def remove_from_summary(collection_id, photo_id):
+    cover_photo_id = PhotoCollection.objects.filter(
+        collection_id    = collection_id,
+        photo_id__isnull = False
+    ).aggregate(cover=Min('photo_id'))['cover']
+
+    Collection.objects.filter(id=collection_id).update(
+        photo_count    = F('photo_count') - 1,
+        cover_photo_id = cover_photo_id,
+        updated_at     = timezone.now(),
+        version        = F('version') + 1
+    )
+
+def refresh_summary(collection_id):
+    summary = PhotoCollection.objects.filter(
+        collection_id    = collection_id,
+        photo_id__isnull = False
+    ).aggregate(count=Count('id'), cover=Min('photo_id'))
+
+    Collection.objects.filter(id=collection_id).update(
+        photo_count    = summary['count'],
+        cover_photo_id = summary['cover'],
+        updated_at     = timezone.now(),
+        version        = F('version') + 1
+    )
+
+def build_collection_summary(collection, photo_exist):
+    return {
+        'collection_name' : collection.name,
+        'first_image'     : collection.cover_photo.image if collection.cover_photo else False,
+        'photo_count'     : collection.photo_count,
+        'private_status'  : collection.private,
+        'photo_exist'     : photo_exist,
+        'version'         : collection.version
+    }
+
+def get_collection_list(user_id, photo_id):
+    collections = Collection.objects.filter(user_id=user_id).select_related('cover_photo')
+    photo_exist = set(PhotoCollection.objects.filter(
+        collection__user_id = user_id,
+        photo_id            = photo_id
+    ).values_list('collection_id', flat=True))
+
+    return [build_collection_summary(collection, collection.id in photo_exist) for collection in collections]
@@ -0,0 +1,177 @@
+import re
+import json
+import colorsys
+
+import numpy as np
+
+from .models     import Photo
+from .change_log import (
+    LOG_LIMIT,
+    log_change,
+    log_seq,
+    read_log
+)
+
+BUCKET_SIZE      = 10.0
+BUCKET_THRESHOLD = 50000
+CELL_OFFSET      = 32
+CELL_BASE        = 64
+NEIGHBORS        = np.array([(dl, da, db) for dl in (-1, 0, 1) for da in (-1, 0, 1) for db in (-1, 0, 1)])
+HEX_COLOR        = re.compile('^#?[0-9a-fA-F]{6}$')
+HUE_BUCKETS      = [
+    (15,  'red'),
+    (45,  'orange'),
+    (70,  'yellow'),
+    (170, 'green'),
+    (255, 'blue'),
+    (290, 'purple'),
+    (335, 'pink'),
+    (360, 'red')
+]
+
+def hex_to_rgb(hex_codes):
+    if not all(HEX_COLOR.match(code) for code in hex_codes):
+        raise ValueError('INVALID_COLOR')
+    codes = [code.lstrip('#') for code in hex_codes]
+    return np.array([[int(code[i:i+2], 16) for i in (0, 2, 4)] for code in codes], dtype=np.float64).reshape(-1, 3)
+
+def rgb_to_lab(rgb):
+    rgb = rgb / 255.0
+    rgb = np.where(rgb > 0.04045, ((rgb + 0.055) / 1.055) ** 2.4, rgb / 12.92)
+    xyz = rgb @ np.array([
+        [0.4124, 0.2126, 0.0193],
+        [0.3576, 0.7152, 0.1192],
+        [0.1805, 0.0722, 0.9505]
+    ]) / np.array([0.95047, 1.0, 1.08883])
+    xyz = np.where(xyz > 0.008856, np.cbrt(xyz), 7.787 * xyz + 16 / 116)
+    return np.stack([
+        116 * xyz[:, 1] - 16,
+        500 * (xyz[:, 0] - xyz[:, 1]),
+        200 * (xyz[:, 1] - xyz[:, 2])
+    ], axis=1)
+
+def hex_to_lab(hex_codes):
+    return rgb_to_lab(hex_to_rgb(hex_codes))
+
+def cell_codes(cells):
+    cells = cells + CELL_OFFSET
+    return (cells[:, 0] * CELL_BASE + cells[:, 1]) * CELL_BASE + cells[:, 2]
+
+def color_bucket(hex_code):
+    if not hex_code or not HEX_COLOR.match(hex_code):
+        return None
+
+    hue, saturation, value = colorsys.rgb_to_hsv(*(hex_to_rgb([hex_code])[0] / 255.0))
+    if value < 0.2:
+        return 'black'
+    if saturation < 0.15:
+        return 'white' if value > 0.85 else 'gray'
+    return next(name for limit, name in HUE_BUCKETS if hue * 360 < limit)
+
+class ColorState:
+    def __init__(self, seq, ids, labs):
+        self.seq   = seq
+        self.ids   = ids
+        self.labs  = labs
+        self.codes = None
+        self.order = None
+        if len(ids) > BUCKET_THRESHOLD:
+            codes      = cell_codes(np.floor(labs / BUCKET_SIZE).astype(np.int64))
+            self.order = np.argsort(codes, kind='stable')
+            self.codes = codes[self.order]
+
+    def candidates(self, lab, limit):
+        if self.codes is None:
+            return np.arange(len(self.ids))
+
+        codes   = cell_codes(np.floor(lab / BUCKET_SIZE).astype(np.int64) + NEIGHBORS)
+        low     = np.searchsorted(self.codes, codes, side='left')
+        high    = np.searchsorted(self.codes, codes, side='right')
+        indexes = np.concatenate([self.order[start:stop] for start, stop in zip(low, high)])
+        if len(indexes) < limit:
+            return np.arange(len(self.ids))
+        return indexes
+
+class ColorIndex:
+    def __init__(self):
+        self.state   = None
+        self.palette = {}
+
+    def to_lab(self, names):
+        missing = sorted(set(names) - self.palette.keys())
+        if missing:
+            self.palette.update(zip(missing, hex_to_lab(missing)))
+        return np.array([self.palette[name] for name in names]).reshape(-1, 3)
+
+    def build(self):
+        seq  = log_seq()
+        rows = [(photo_id, name) for photo_id, name in Photo.objects.filter(
+            background_color__isnull = False
+        ).values_list('id', 'background_color__name') if HEX_COLOR.match(name)]
+        return ColorState(
+            seq,
+            np.array([photo_id for photo_id, _ in rows], dtype=np.int64),
+            self.to_lab([name for _, name in rows])
+        )
+
+    def apply(self, state, seq, entries):
+        changed = {}
+        for op, photo_id, _, name in map(json.loads, entries):
+            if op == 'color':
+                changed[photo_id] = name if HEX_COLOR.match(name) else None
+            elif op == 'drop_photo':
+                changed[photo_id] = None
+        if not changed:
+            return ColorState(seq, state.ids, state.labs)
+
+        keep  = ~np.isin(state.ids, np.array(list(changed), dtype=np.int64))
+        added = [(photo_id, name) for photo_id, name in changed.items() if name]
+        return ColorState(
+            seq,
+            np.concatenate([state.ids[keep], np.array([photo_id for photo_id, _ in added], dtype=np.int64)]),
+            np.concatenate([state.labs[keep], self.to_lab([name for _, name in added])])
+        )
+
+    def refresh(self):
+        state = self.state
+        if state is None:
+            self.state = self.build()
+            return self.state
+
+        seq, entries, needed = read_log(state.seq)
+        if needed > LOG_LIMIT or needed < 0:
+            self.state = self.build()
+        elif entries:
+            self.state = self.apply(state, seq, entries)
+        return self.state
+
+    def nearest(self, lab, limit, exclude=None):
+        if limit <= 0:
+            return []
+        state      = self.refresh()
+        candidates = state.candidates(lab, limit + 1)
+        if exclude is not None:
+            candidates = candidates[state.ids[candidates] != exclude]
+        if not len(candidates):
+            return []
+
+        distances = ((state.labs[candidates] - lab) ** 2).sum(axis=1)
+        if len(candidates) > limit:
+            top = np.argpartition(distances, limit)[:limit]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(distances[top], kind='stable')]
+        return state.ids[candidates[top]].tolist()
+
+color_index = ColorIndex()
+
+def add_photo_color(photo_id, hex_code):
+    log_change('color', photo_id, name=hex_code)
+
+def similar_to_color(hex_code, limit):
+    return color_index.nearest(hex_to_lab([hex_code])[0], limit)
+
+def similar_to_photo(photo, limit):
+    if not photo.background_color:
+        return []
+    return color_index.nearest(hex_to_lab([photo.background_color.name])[0], limit, exclude=photo.id)
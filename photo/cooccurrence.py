@@ -0,0 +1,107 @@
+import math
+from collections import Counter
+
+from django.db        import transaction
+from django.db.models import (
+    F,
+    Case,
+    When,
+    Value,
+    Count,
+    IntegerField
+)
+
+from .models import (
+    PhotoHashTag,
+    TagCooccurrence
+)
+
+REBUILD_BATCH = 1000
+MIN_SUPPORT   = 2
+
+def rebuild_cooccurrence():
+    pairs = PhotoHashTag.objects.filter(
+        hashtag_id__isnull                      = False,
+        photo__photohashtag__hashtag_id__isnull = False
+    ).values('hashtag_id', 'photo__photohashtag__hashtag_id').annotate(
+        count = Count('photo_id', distinct=True)
+    ).values_list('hashtag_id', 'photo__photohashtag__hashtag_id', 'count')
+
+    with transaction.atomic():
+        TagCooccurrence.objects.all().delete()
+        TagCooccurrence.objects.bulk_create([
+            TagCooccurrence(hashtag_id=hashtag_id, related_id=related_id, count=count)
+            for hashtag_id, related_id, count in pairs
+        ], batch_size=REBUILD_BATCH)
+
+def add_photo_tags(photo_id, tag_ids):
+    tag_ids = set(tag_ids)
+    if not tag_ids:
+        return
+
+    photo_tags = set(PhotoHashTag.objects.filter(
+        photo_id           = photo_id,
+        hashtag_id__isnull = False
+    ).values_list('hashtag_id', flat=True))
+    new_tags      = tag_ids & photo_tags
+    existing_tags = photo_tags - new_tags
+    if not new_tags:
+        return
+
+    with transaction.atomic():
+        TagCooccurrence.objects.bulk_create([
+            TagCooccurrence(hashtag_id=hashtag_id, related_id=related_id)
+            for hashtag_id in new_tags for related_id in photo_tags
+        ] + [
+            TagCooccurrence(hashtag_id=hashtag_id, related_id=related_id)
+            for hashtag_id in existing_tags for related_id in new_tags
+        ], ignore_conflicts=True)
+        TagCooccurrence.objects.filter(
+            hashtag_id__in = new_tags,
+            related_id__in = photo_tags
+        ).update(count=F('count') + 1)
+        TagCooccurrence.objects.filter(
+            hashtag_id__in = existing_tags,
+            related_id__in = new_tags
+        ).update(count=F('count') + 1)
+
+def add_single_tag_photos(tag_ids):
+    counts = Counter(tag_ids)
+    if not counts:
+        return
+
+    with transaction.atomic():
+        TagCooccurrence.objects.bulk_create([
+            TagCooccurrence(hashtag_id=tag_id, related_id=tag_id) for tag_id in counts
+        ], ignore_conflicts=True)
+        TagCooccurrence.objects.filter(
+            hashtag_id__in = counts,
+            related_id     = F('hashtag_id')
+        ).update(count=F('count') + Case(
+            *[When(hashtag_id=tag_id, then=Value(count)) for tag_id, count in counts.items()],
+            output_field = IntegerField()
+        ))
+
+def get_related_tags(name, limit, rank='count'):
+    rows = TagCooccurrence.objects.filter(hashtag__name=name).exclude(related_id=F('hashtag_id'))
+    if rank != 'pmi':
+        return list(rows.order_by('-count', 'related_id').values_list('related__name', flat=True)[:limit])
+
+    rows = list(rows.filter(count__gte=MIN_SUPPORT).values_list('hashtag_id', 'related_id', 'related__name', 'count'))
+    if not rows:
+        return []
+
+    tag_ids = {row[0] for row in rows} | {row[1] for row in rows}
+    df      = dict(TagCooccurrence.objects.filter(
+        hashtag_id__in = tag_ids,
+        related_id     = F('hashtag_id')
+    ).values_list('hashtag_id', 'count'))
+    total   = PhotoHashTag.objects.filter(hashtag_id__isnull=False).aggregate(
+        total = Count('photo_id', distinct=True)
+    )['total']
+
+    scores = {}
+    for hashtag_id, related_id, related_name, count in rows:
+        pmi = math.log(count * total / (df.get(hashtag_id, count) * df.get(related_id, count)))
+        scores[related_name] = max(scores.get(related_name, (pmi, count)), (pmi, count))
+    return sorted(scores, key=lambda related_name: scores[related_name], reverse=True)[:limit]
@@ -0,0 +1,126 @@
+import uuid
+from datetime import timedelta
+
+from django.db        import transaction
+from django.db.models import (
+    Case,
+    When,
+    Value,
+    F,
+    IntegerField
+)
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from .models import (
+    Photo,
+    CounterFlush
+)
+
+CLAIM_FLUSH = """
+if redis.call('exists', KEYS[2]) == 0 then
+    if redis.call('exists', KEYS[1]) == 0 then
+        return false
+    end
+    redis.call('rename', KEYS[1], KEYS[2])
+    redis.call('set', KEYS[3], ARGV[1])
+end
+return redis.call('get', KEYS[3])
+"""
+
+CLEAR_FLUSH = """
+if redis.call('get', KEYS[2]) == ARGV[1] then
+    redis.call('del', KEYS[1], KEYS[2])
+end
+"""
+
+RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    redis.call('del', KEYS[1])
+end
+"""
+
+class BufferedCounter:
+    FLUSH_BATCH     = 500
+    LOCK_TIMEOUT    = 60 * 5
+    FLUSH_RETENTION = timedelta(days=1)
+
+    def __init__(self, field):
+        self.field        = field
+        self.key          = f'photo_{field}_buffer'
+        self.flushing_key = f'photo_{field}_flushing'
+        self.flush_id_key = f'photo_{field}_flush_id'
+        self.lock_key     = f'photo_{field}_flush_lock'
+
+    @property
+    def redis(self):
+        return get_redis_connection('default')
+
+    def incr(self, photo_id, amount=1):
+        self.redis.hincrby(self.key, photo_id, amount)
+
+    def pending(self, photo_ids):
+        pipe = self.redis.pipeline()
+        pipe.hmget(self.key, photo_ids)
+        pipe.hmget(self.flushing_key, photo_ids)
+        buffered, flushing = pipe.execute()
+        return {
+            photo_id : int(buffered[index] or 0) + int(flushing[index] or 0)
+            for index, photo_id in enumerate(photo_ids)
+        }
+
+    def flush(self):
+        token = uuid.uuid4().hex
+        if not self.redis.set(self.lock_key, token, nx=True, ex=self.LOCK_TIMEOUT):
+            return 0
+        try:
+            return self.apply_flush()
+        finally:
+            self.redis.eval(RELEASE_LOCK, 1, self.lock_key, token)
+
+    def apply_flush(self):
+        flush_id = self.redis.eval(
+            CLAIM_FLUSH, 3, self.key, self.flushing_key, self.flush_id_key, f'{self.field}_{uuid.uuid4().hex}'
+        )
+        if not flush_id:
+            return 0
+        flush_id = flush_id.decode()
+
+        counts    = {int(photo_id) : int(count) for photo_id, count in self.redis.hgetall(self.flushing_key).items()}
+        photo_ids = list(counts)
+        with transaction.atomic():
+            _, created = CounterFlush.objects.get_or_create(flush_id=flush_id)
+            if created:
+                for start in range(0, len(photo_ids), self.FLUSH_BATCH):
+                    batch = photo_ids[start:start+self.FLUSH_BATCH]
+                    Photo.objects.filter(id__in=batch).update(**{
+                        self.field : F(self.field) + Case(
+                            *[When(id=photo_id, then=Value(counts[photo_id])) for photo_id in batch],
+                            default      = Value(0),
+                            output_field = IntegerField()
+                        )
+                    })
+                CounterFlush.objects.filter(created_at__lt=timezone.now() - self.FLUSH_RETENTION).delete()
+        self.redis.eval(CLEAR_FLUSH, 2, self.flushing_key, self.flush_id_key, flush_id)
+        return len(photo_ids) if created else 0
+
+class UniqueCounter:
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def redis(self):
+        return get_redis_connection('default')
+
+    def key(self, photo_id):
+        return f'photo_{self.name}_{photo_id}'
+
+    def add(self, photo_id, member):
+        self.redis.pfadd(self.key(photo_id), member)
+
+    def count(self, photo_id):
+        return self.redis.pfcount(self.key(photo_id))
+
+view_counter       = BufferedCounter('views')
+download_counter   = BufferedCounter('downloads')
+downloader_counter = UniqueCounter('downloaders')
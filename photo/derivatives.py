@@ -0,0 +1,80 @@
+import io
+import math
+
+from PIL import (
+    Image,
+    ImageOps
+)
+
+from my_settings import AWS_S3
+
+from .models  import Photo
+from .images  import (
+    EXIF_ORIENTATION,
+    ROTATED
+)
+from .storage import (
+    BUCKET,
+    get_s3_client
+)
+
+DERIVATIVE_WIDTHS  = (200, 400, 800, 1600)
+DERIVATIVE_FORMATS = {
+    'webp' : ('WEBP', 'image/webp', 'webp'),
+    'jpeg' : ('JPEG', 'image/jpeg', 'jpg')
+}
+DERIVATIVE_QUALITY = 80
+CACHE_CONTROL      = 'public, max-age=31536000, immutable'
+
+def derivative_url(image, width, image_format):
+    return f'{image}_{width}.{DERIVATIVE_FORMATS[image_format][2]}'
+
+def build_srcset(image, derivatives):
+    widths = [int(width) for width in (derivatives or '').split(',') if width]
+    if not widths:
+        return {}
+    return {
+        image_format : {str(width) : derivative_url(image, width, image_format) for width in widths}
+        for image_format in DERIVATIVE_FORMATS
+    }
+
+def render_derivatives(data, widths=DERIVATIVE_WIDTHS):
+    image   = Image.open(io.BytesIO(data))
+    rotated = image.getexif().get(EXIF_ORIENTATION, 1) in ROTATED
+    width, height = (image.height, image.width) if rotated else image.size
+    targets = sorted((target for target in widths if target < width), reverse=True)
+    if not targets:
+        return {}
+
+    largest = targets[0]
+    box     = (largest, math.ceil(largest * height / width))
+    image.draft('RGB', box[::-1] if rotated else box)
+    image = ImageOps.exif_transpose(image).convert('RGB')
+
+    rendered = {}
+    for target in targets:
+        image = image.resize((target, max(1, round(image.height * target / image.width))), Image.LANCZOS, reducing_gap=3.0)
+        for image_format, (pil_format, _, _) in DERIVATIVE_FORMATS.items():
+            buffer = io.BytesIO()
+            image.save(buffer, pil_format, quality=DERIVATIVE_QUALITY)
+            rendered[(target, image_format)] = buffer.getvalue()
+    return rendered
+
+def generate_derivatives(photo_url):
+    s3_client = get_s3_client()
+    key       = photo_url[len(AWS_S3['url']):]
+    rendered  = render_derivatives(s3_client.get_object(Bucket=BUCKET, Key=key)['Body'].read())
+
+    for (width, image_format), body in rendered.items():
+        s3_client.put_object(
+            Bucket       = BUCKET,
+            Key          = derivative_url(key, width, image_format),
+            Body         = body,
+            ContentType  = DERIVATIVE_FORMATS[image_format][1],
+            CacheControl = CACHE_CONTROL
+        )
+
+    photo             = Photo.objects.get(image=photo_url)
+    photo.derivatives = ','.join(str(width) for width in sorted({width for width, _ in rendered}))
+    photo.save(update_fields=['derivatives'])
+    return photo.derivatives
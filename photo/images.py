@@ -0,0 +1,36 @@
+from PIL import Image
+
+EXIF_ORIENTATION = 0x0112
+ROTATED          = {5, 6, 7, 8}
+
+def header_orientation(image):
+    # getexif() loads the pixels when the EXIF block may follow them (PNG), so only
+    # read an EXIF block the plugin already found while parsing the header.
+    exif = image.info.get('exif')
+    if not exif:
+        return 1
+    data = Image.Exif()
+    data.load(exif)
+    return data.get(EXIF_ORIENTATION, 1)
+
+def read_image_meta(image_file):
+    position = image_file.tell()
+    try:
+        with Image.open(image_file) as image:
+            width, height = image.size
+            image_format  = image.format
+            orientation   = header_orientation(image)
+    except (OSError, Image.DecompressionBombError):
+        return None
+    finally:
+        image_file.seek(position)
+
+    if orientation in ROTATED:
+        width, height = height, width
+    return {
+        "width"        : width,
+        "height"       : height,
+        "format"       : image_format,
+        "orientation"  : orientation,
+        "content_type" : Image.MIME.get(image_format, 'application/octet-stream')
+    }
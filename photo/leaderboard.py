@@ -0,0 +1,57 @@
+from django.db.models import Count
+from django_redis     import get_redis_connection
+
+from account.models import User
+
+from .models import (
+    Photo,
+    PhotoCollection
+)
+
+def leaderboard_key(collection_id):
+    return f'collection_contributors_{collection_id}'
+
+def rebuild_leaderboard(collection_id):
+    redis  = get_redis_connection('default')
+    scores = {
+        user_id : count
+        for user_id, count in PhotoCollection.objects.filter(
+            collection_id          = collection_id,
+            photo__user_id__isnull = False
+        ).values('photo__user_id').annotate(count=Count('id')).values_list('photo__user_id', 'count')
+    }
+    pipe = redis.pipeline()
+    pipe.delete(leaderboard_key(collection_id))
+    if scores:
+        pipe.zadd(leaderboard_key(collection_id), scores)
+    pipe.execute()
+
+def refresh_leaderboard(collection_id):
+    if get_redis_connection('default').exists(leaderboard_key(collection_id)):
+        rebuild_leaderboard(collection_id)
+
+def update_leaderboard(collection_id, photo_id, amount):
+    redis = get_redis_connection('default')
+    key   = leaderboard_key(collection_id)
+    if not redis.exists(key):
+        return
+
+    user_id = Photo.objects.filter(id=photo_id).values_list('user_id', flat=True).first()
+    if user_id:
+        pipe = redis.pipeline()
+        pipe.zincrby(key, amount, user_id)
+        pipe.zremrangebyscore(key, '-inf', 0)
+        pipe.execute()
+
+def get_top_contributors(collection, limit):
+    redis = get_redis_connection('default')
+    key   = leaderboard_key(collection.id)
+    if collection.photo_count and not redis.exists(key):
+        rebuild_leaderboard(collection.id)
+
+    user_ids = [int(user_id) for user_id in redis.zrevrange(key, 0, limit - 1)]
+    users    = User.objects.in_bulk(user_ids)
+    return [{
+        'id'            : user_id,
+        'profile_image' : users[user_id].profile_image
+    } for user_id in user_ids if user_id in users]
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from photo.cards import get_card_stats
+
+class Command(BaseCommand):
+    help = 'Show photo card cache hit and miss counters'
+
+    def handle(self, *args, **options):
+        stats = get_card_stats()
+        self.stdout.write(f"hits: {stats['hits']}  misses: {stats['misses']}  hit rate: {stats['hit_rate']:.2%}")
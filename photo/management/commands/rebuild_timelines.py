@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from account.models import User
+from photo.timeline import rebuild_timeline
+
+class Command(BaseCommand):
+    help = 'Rebuild Following feed timelines from the follows table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Rebuild only this user id')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user_ids = [options['user']]
+        else:
+            user_ids = User.objects.values_list('id', flat=True)
+
+        for user_id in user_ids:
+            rebuild_timeline(user_id)
+        self.stdout.write(self.style.SUCCESS('Timelines rebuilt'))
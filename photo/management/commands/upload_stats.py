@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from photo.storage import get_upload_stats
+
+class Command(BaseCommand):
+    help = 'Show S3 upload throughput and part counts for recent uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', action='store_true', help='List every recorded upload')
+
+    def handle(self, *args, **options):
+        stats = get_upload_stats()
+        self.stdout.write(
+            f"uploads: {stats['uploads']}  throughput: {stats['throughput'] / 1024 / 1024:.2f} MB/s  "
+            f"parts: {stats['parts']:.1f}  chunksize: {stats['multipart_chunksize'] // 1024 // 1024} MB  "
+            f"concurrency: {stats['max_concurrency']}"
+        )
+        if options['samples']:
+            for sample in stats['samples']:
+                self.stdout.write(f"{sample['bytes']} bytes  {sample['seconds']:.3f}s  {sample['parts']} parts")
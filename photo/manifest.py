@@ -0,0 +1,77 @@
+import json
+import time
+import zlib
+import hashlib
+
+from django.core.cache import cache
+
+from .models        import (
+    Photo,
+    PhotoCollection
+)
+from .category_feed import get_category_feed
+from .search_index  import posting_index
+from .colors        import HEX_COLOR
+
+MANIFEST_VERSION_KEY = 'manifest_version'
+MANIFEST_FIELDS      = ["id", "background_color", "width", "height"]
+MANIFEST_TIMEOUT     = 60 * 10
+
+def build_manifest(photo_ids):
+    rows = {
+        photo_id : (int(color.lstrip('#'), 16) if color and HEX_COLOR.match(color) else None, width, height)
+        for photo_id, color, width, height in Photo.objects.filter(
+            id__in = photo_ids
+        ).values_list('id', 'background_color__name', 'width', 'height')
+    }
+    photo_ids = [photo_id for photo_id in photo_ids if photo_id in rows]
+    return json.dumps({
+        "fields" : MANIFEST_FIELDS,
+        "data"   : [
+            photo_ids,
+            [rows[photo_id][0] for photo_id in photo_ids],
+            [rows[photo_id][1] for photo_id in photo_ids],
+            [rows[photo_id][2] for photo_id in photo_ids]
+        ]
+    }, separators=(',', ':'))
+
+def get_manifest_version():
+    version = cache.get(MANIFEST_VERSION_KEY)
+    if version is None:
+        cache.add(MANIFEST_VERSION_KEY, str(time.time_ns()), None)
+        version = cache.get(MANIFEST_VERSION_KEY)
+    return version
+
+def bump_manifest_version():
+    cache.set(MANIFEST_VERSION_KEY, str(time.time_ns()), None)
+
+def get_manifest(key, get_photo_ids):
+    key      = f'{key}_{get_manifest_version()}'
+    manifest = cache.get(key)
+    if manifest is None:
+        manifest = build_manifest(get_photo_ids())
+        cache.set(key, manifest, MANIFEST_TIMEOUT)
+    return manifest
+
+def get_category_manifest(name):
+    feed = get_category_feed(name)
+    return get_manifest(
+        f'manifest_category_{name}_{zlib.crc32(feed.tobytes())}',
+        lambda: list(reversed(feed))
+    )
+
+def get_collection_manifest(collection):
+    return get_manifest(
+        f'manifest_collection_{collection.id}_{collection.version}',
+        lambda: list(PhotoCollection.objects.filter(
+            collection_id    = collection.id,
+            photo_id__isnull = False
+        ).order_by('-photo_id').values_list('photo_id', flat=True).distinct())
+    )
+
+def get_search_manifest(tag):
+    photo_ids = posting_index.search([tag])
+    return get_manifest(
+        f'manifest_search_{hashlib.md5(tag.encode("utf-8")).hexdigest()}_{zlib.crc32(photo_ids.tobytes())}',
+        lambda: photo_ids[::-1].tolist()
+    )
@@ -0,0 +1,27 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0003_auto_20200814_1421'),
+        ('photo', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Timeline',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('photo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='photo.Photo')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='account.User')),
+            ],
+            options={
+                'db_table': 'timelines',
+                'unique_together': {('user', 'photo')},
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:28
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_tag_cooccurrence(apps, schema_editor):
+    PhotoHashTag    = apps.get_model('photo', 'PhotoHashTag')
+    TagCooccurrence = apps.get_model('photo', 'TagCooccurrence')
+
+    pairs = PhotoHashTag.objects.filter(
+        hashtag_id__isnull                      = False,
+        photo__photohashtag__hashtag_id__isnull = False
+    ).values('hashtag_id', 'photo__photohashtag__hashtag_id').annotate(
+        count = Count('photo_id', distinct=True)
+    ).values_list('hashtag_id', 'photo__photohashtag__hashtag_id', 'count')
+    TagCooccurrence.objects.bulk_create([
+        TagCooccurrence(hashtag_id=hashtag_id, related_id=related_id, count=count)
+        for hashtag_id, related_id, count in pairs
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photo', '0002_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagCooccurrence',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cooccurrences', to='photo.HashTag')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='photo.HashTag')),
+            ],
+            options={
+                'db_table': 'tag_cooccurrences',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='tagcooccurrence',
+            index=models.Index(fields=['hashtag', '-count'], name='tag_cooccur_hashtag_feed20_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='tagcooccurrence',
+            unique_together={('hashtag', 'related')},
+        ),
+        migrations.RunPython(fill_tag_cooccurrence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photo', '0003_tag_cooccurrence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='derivatives',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+    ]
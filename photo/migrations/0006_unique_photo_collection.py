@@ -0,0 +1,47 @@
+from django.db import migrations
+from django.db.models import (
+    Count,
+    Min
+)
+
+
+def remove_duplicate_memberships(apps, schema_editor):
+    PhotoCollection = apps.get_model('photo', 'PhotoCollection')
+    Collection      = apps.get_model('account', 'Collection')
+
+    duplicates = PhotoCollection.objects.filter(
+        photo_id__isnull      = False,
+        collection_id__isnull = False
+    ).values('photo_id', 'collection_id').annotate(
+        keep  = Min('id'),
+        count = Count('id')
+    ).filter(count__gt=1)
+
+    collection_ids = set()
+    for row in duplicates:
+        PhotoCollection.objects.filter(
+            photo_id      = row['photo_id'],
+            collection_id = row['collection_id']
+        ).exclude(id=row['keep']).delete()
+        collection_ids.add(row['collection_id'])
+
+    for collection_id in collection_ids:
+        Collection.objects.filter(id=collection_id).update(
+            photo_count = PhotoCollection.objects.filter(collection_id=collection_id, photo_id__isnull=False).count()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_collection_version'),
+        ('photo', '0005_counter_flush'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_memberships, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='photocollection',
+            unique_together={('photo', 'collection')},
+        ),
+    ]
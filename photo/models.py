@@ -16,6 +16,7 @@ class Photo(models.Model):
     background_color = models.ForeignKey('BackGroundColor', on_delete = models.SET_NULL, null=True)
     width            = models.IntegerField(null=True)
     height           = models.IntegerField(null=True)
+    derivatives      = models.CharField(max_length = 50, default='', blank=True)
     
 
     class Meta:
@@ -39,10 +40,36 @@ class PhotoCollection(models.Model):
     collection = models.ForeignKey(Collection, on_delete = models.SET_NULL, null = True)
 
     class Meta:
-        db_table = 'photos_collections'
+        db_table        = 'photos_collections'
+        unique_together = ('photo', 'collection')
 
 class BackGroundColor(models.Model):
     name = models.CharField(max_length=50)
 
     class Meta:
         db_table = 'background_colors'
+
+class Timeline(models.Model):
+    user  = models.ForeignKey(User, on_delete = models.CASCADE)
+    photo = models.ForeignKey(Photo, on_delete = models.CASCADE)
+
+    class Meta:
+        db_table        = 'timelines'
+        unique_together = ('user', 'photo')
+
+class TagCooccurrence(models.Model):
+    hashtag = models.ForeignKey(HashTag, on_delete = models.CASCADE, related_name = 'cooccurrences')
+    related = models.ForeignKey(HashTag, on_delete = models.CASCADE, related_name = '+')
+    count   = models.PositiveIntegerField(default = 0)
+
+    class Meta:
+        db_table        = 'tag_cooccurrences'
+        unique_together = ('hashtag', 'related')
+        indexes         = [models.Index(fields = ['hashtag', '-count'])]
+
+class CounterFlush(models.Model):
+    flush_id   = models.CharField(max_length = 50, unique = True)
+    created_at = models.DateTimeField(auto_now_add = True)
+
+    class Meta:
+        db_table = 'counter_flushes'
@@ -0,0 +1,37 @@
+import base64
+import bisect
+
+def encode_cursor(photo_id):
+    return base64.urlsafe_b64encode(str(photo_id).encode('utf-8')).decode('utf-8').rstrip('=')
+
+def decode_cursor(cursor):
+    padding = '=' * (-len(cursor) % 4)
+    return int(base64.urlsafe_b64decode(cursor + padding).decode('utf-8'))
+
+def paginate(photos, offset, limit, after=None, key='id'):
+    if after is None:
+        return list(photos[offset*limit:(offset+1)*limit]), None
+
+    if after:
+        photos = photos.filter(**{f'{key}__lt' : decode_cursor(after)})
+
+    page = list(photos[:limit+1])
+    if len(page) > limit:
+        page = page[:limit]
+        return page, encode_cursor(getattr(page[-1], key))
+    return page, None
+
+def paginate_ids(photo_ids, offset, limit, after=None):
+    if after is None:
+        end = len(photo_ids) - offset*limit
+    elif after:
+        end = bisect.bisect_left(photo_ids, decode_cursor(after))
+    else:
+        end = len(photo_ids)
+
+    end   = max(end, 0)
+    start = max(end - limit, 0)
+    page  = [int(photo_id) for photo_id in reversed(photo_ids[start:end])]
+    if after is not None and start > 0:
+        return page, encode_cursor(page[-1])
+    return page, None
@@ -0,0 +1,65 @@
+import math
+
+from django.core.cache import cache
+from django.db.models  import (
+    Case,
+    When,
+    Value,
+    Sum,
+    Count,
+    FloatField
+)
+
+from .models import (
+    Photo,
+    PhotoHashTag
+)
+
+RELATED_LIMIT   = 50
+RELATED_TIMEOUT = 60 * 60 * 24
+
+def related_key(photo_id):
+    return f'related_photos_{photo_id}'
+
+def get_tag_weights(tag_ids, weighted=True):
+    if not weighted:
+        return {tag_id : 1.0 for tag_id in tag_ids}
+
+    total = Photo.objects.count()
+    df    = dict(PhotoHashTag.objects.filter(
+        hashtag_id__in = tag_ids
+    ).values('hashtag_id').annotate(count=Count('photo_id', distinct=True)).values_list('hashtag_id', 'count'))
+    return {tag_id : math.log(1 + total / df.get(tag_id, 1)) for tag_id in tag_ids}
+
+def compute_related_photos(photo_id, weighted=True):
+    tag_ids = list(PhotoHashTag.objects.filter(
+        photo_id           = photo_id,
+        hashtag_id__isnull = False
+    ).values_list('hashtag_id', flat=True).distinct())
+    if not tag_ids:
+        return []
+
+    weights = get_tag_weights(tag_ids, weighted)
+    score   = Sum(Case(
+        *[When(hashtag_id=tag_id, then=Value(weight)) for tag_id, weight in weights.items()],
+        output_field = FloatField()
+    ))
+    return list(PhotoHashTag.objects.filter(
+        hashtag_id__in   = tag_ids,
+        photo_id__isnull = False
+    ).exclude(photo_id=photo_id).values('photo_id').annotate(
+        score = score
+    ).order_by('-score', '-photo_id').values_list('photo_id', flat=True)[:RELATED_LIMIT])
+
+def refresh_related_photos(photo_id):
+    related = compute_related_photos(photo_id)
+    cache.set(related_key(photo_id), related, RELATED_TIMEOUT)
+    cache.delete_many([related_key(related_id) for related_id in related])
+    return related
+
+def get_related_photos(photo_id):
+    related = cache.get(related_key(photo_id))
+    if related is None:
+        related = compute_related_photos(photo_id)
+        cache.set(related_key(photo_id), related, RELATED_TIMEOUT)
+    return related
@@ -0,0 +1,180 @@
+import json
+from functools import reduce
+
+import numpy as np
+
+from .models     import (
+    Photo,
+    PhotoHashTag,
+    TagCooccurrence
+)
+from .colors     import color_bucket
+from .pagination import paginate_ids
+from .change_log import (
+    LOG_LIMIT,
+    read_log
+)
+
+FACET_TAGS       = 10
+FACET_CANDIDATES = 30
+SQUARE_RATIO     = 1.05
+EMPTY            = np.empty(0, dtype=np.uint32)
+
+def orientation(width, height):
+    if not width or not height:
+        return None
+    if width > height * SQUARE_RATIO:
+        return 'landscape'
+    if height > width * SQUARE_RATIO:
+        return 'portrait'
+    return 'square'
+
+def photo_facets(photo):
+    background_color = photo.background_color.name if photo.background_color_id else None
+    return {
+        'color'       : color_bucket(background_color),
+        'orientation' : orientation(photo.width, photo.height)
+    }
+
+class PostingIndex:
+    def __init__(self):
+        self.seq      = None
+        self.postings = {}
+        self.names    = {}
+        self.facets   = {}
+        self.deleted  = set()
+
+    def build(self):
+        rows = PhotoHashTag.objects.filter(
+            photo_id__isnull   = False,
+            hashtag_id__isnull = False
+        ).values_list('hashtag_id', 'hashtag__name', 'photo_id').order_by('hashtag_id', 'photo_id')
+
+        postings = {}
+        names    = {}
+        for tag_id, name, photo_id in rows:
+            postings.setdefault(tag_id, []).append(photo_id)
+            names.setdefault(name.lower(), set()).add(tag_id)
+
+        facets = {'color' : {}, 'orientation' : {}}
+        photos = Photo.objects.values_list('id', 'background_color__name', 'width', 'height').order_by('id')
+        for photo_id, background_color, width, height in photos:
+            for facet, value in (('color', color_bucket(background_color)), ('orientation', orientation(width, height))):
+                if value:
+                    facets[facet].setdefault(value, []).append(photo_id)
+
+        self.postings = {tag_id : np.unique(np.array(ids, dtype=np.uint32)) for tag_id, ids in postings.items()}
+        self.names    = names
+        self.facets   = {
+            facet : {value : np.array(ids, dtype=np.uint32) for value, ids in values.items()}
+            for facet, values in facets.items()
+        }
+        self.deleted  = set()
+
+    def apply(self, entries):
+        changes = {}
+        photos  = {}
+        for op, photo_id, tag_id, name in map(json.loads, entries):
+            if op == 'photo':
+                photos[photo_id] = json.loads(name)
+            elif op == 'add':
+                self.names.setdefault(name.lower(), set()).add(tag_id)
+                changes[(tag_id, photo_id)] = True
+            elif op == 'remove':
+                changes[(tag_id, photo_id)] = False
+            elif op == 'drop_photo':
+                self.deleted.add(photo_id)
+            elif op == 'drop_tag':
+                self.postings.pop(tag_id, None)
+                self.names.get(name.lower(), set()).discard(tag_id)
+
+        added   = {}
+        removed = {}
+        for (tag_id, photo_id), present in changes.items():
+            (added if present else removed).setdefault(tag_id, []).append(photo_id)
+        for tag_id in added.keys() | removed.keys():
+            posting = np.union1d(self.postings.get(tag_id, EMPTY), np.array(added.get(tag_id, []), dtype=np.uint32))
+            posting = np.setdiff1d(posting, np.array(removed.get(tag_id, []), dtype=np.uint32))
+            self.postings[tag_id] = posting.astype(np.uint32)
+
+        if photos:
+            photo_ids = np.array(sorted(photos), dtype=np.uint32)
+            for facet, values in self.facets.items():
+                added = {}
+                for photo_id, facets in photos.items():
+                    if facets.get(facet):
+                        added.setdefault(facets[facet], []).append(photo_id)
+                for value in values.keys() | added.keys():
+                    ids = np.setdiff1d(values.get(value, EMPTY), photo_ids, assume_unique=True)
+                    values[value] = np.union1d(ids, np.array(added.get(value, []), dtype=np.uint32)).astype(np.uint32)
+
+    def refresh(self):
+        seq, entries, needed = read_log(self.seq or 0)
+        if self.seq is None or needed > LOG_LIMIT or needed < 0:
+            self.build()
+        elif entries:
+            self.apply(entries)
+        self.seq = seq
+
+    def posting(self, name):
+        tag_ids = self.names.get(name.lower(), ())
+        return reduce(np.union1d, [self.postings.get(tag_id, EMPTY) for tag_id in tag_ids], EMPTY)
+
+    def search(self, all_tags=(), any_tags=(), not_tags=()):
+        self.refresh()
+
+        lists = [self.posting(name) for name in all_tags]
+        if any_tags:
+            lists.append(reduce(np.union1d, [self.posting(name) for name in any_tags]))
+        if not lists:
+            return EMPTY
+
+        lists.sort(key=len)
+        result = reduce(lambda left, right: np.intersect1d(left, right, assume_unique=True), lists)
+        exclude = [self.posting(name) for name in not_tags]
+        if self.deleted:
+            exclude.append(np.array(sorted(self.deleted), dtype=np.uint32))
+        if exclude and len(result):
+            result = result[~np.isin(result, reduce(np.union1d, exclude), assume_unique=True)]
+        return result
+
+    def count(self, bitmap, ids):
+        ids = ids[:np.searchsorted(ids, len(bitmap))]
+        return int(np.count_nonzero(bitmap[ids]))
+
+    def facet_counts(self, result, tags):
+        if not len(result):
+            return {"tags" : [], "colors" : {}, "orientation" : {}}
+
+        bitmap         = np.zeros(int(result[-1]) + 1, dtype=bool)
+        bitmap[result] = True
+
+        tag_ids    = set().union(*[self.names.get(name.lower(), ()) for name in tags])
+        candidates = TagCooccurrence.objects.filter(
+            hashtag_id__in = tag_ids
+        ).exclude(related_id__in=tag_ids).order_by('-count').values_list('related_id', 'related__name')[:FACET_CANDIDATES]
+        tag_counts = {}
+        for related_id, name in candidates:
+            count = self.count(bitmap, self.postings.get(related_id, EMPTY))
+            if count:
+                tag_counts[name] = max(tag_counts.get(name, 0), count)
+
+        return {
+            "tags"        : [
+                {"name" : name, "count" : count}
+                for name, count in sorted(tag_counts.items(), key=lambda item: (-item[1], item[0]))[:FACET_TAGS]
+            ],
+            "colors"      : {
+                value : count
+                for value, count in ((value, self.count(bitmap, ids)) for value, ids in self.facets.get('color', {}).items())
+                if count
+            },
+            "orientation" : {value : self.count(bitmap, ids) for value, ids in self.facets.get('orientation', {}).items()}
+        }
+
+posting_index = PostingIndex()
+
+def search_photos(all_tags, any_tags, not_tags, offset, limit, after=None):
+    result                 = posting_index.search(all_tags, any_tags, not_tags)
+    photo_ids, next_cursor = paginate_ids(result, offset, limit, after)
+    return photo_ids, next_cursor, posting_index.facet_counts(result, all_tags + any_tags)
@@ -0,0 +1,77 @@
+import json
+
+from django.db.models.signals import (
+    post_save,
+    post_delete
+)
+from django.dispatch          import receiver
+
+from account.models import User
+
+from .models             import (
+    Photo,
+    PhotoCollection,
+    PhotoHashTag,
+    HashTag
+)
+from .cards              import invalidate_cards
+from .collection_summary import (
+    add_to_summary,
+    remove_from_summary
+)
+from .leaderboard        import update_leaderboard
+from .suggest            import bump_hashtag_version
+from .search_index       import photo_facets
+from .change_log         import log_change
+
+@receiver([post_save, post_delete], sender=Photo)
+def invalidate_photo_card(sender, instance, **kwargs):
+    invalidate_cards([instance.id])
+
+@receiver(post_save, sender=User)
+def invalidate_user_cards(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_cards(Photo.objects.filter(user_id=instance.id).values_list('id', flat=True))
+
+@receiver(post_save, sender=PhotoCollection)
+def add_photo_to_collection_summary(sender, instance, created, **kwargs):
+    if created and instance.collection_id and instance.photo_id:
+        add_to_summary(instance.collection_id, instance.photo_id)
+        update_leaderboard(instance.collection_id, instance.photo_id, 1)
+
+@receiver(post_delete, sender=PhotoCollection)
+def remove_photo_from_collection_summary(sender, instance, **kwargs):
+    if instance.collection_id and instance.photo_id:
+        remove_from_summary(instance.collection_id, instance.photo_id)
+        update_leaderboard(instance.collection_id, instance.photo_id, -1)
+
+@receiver([post_save, post_delete], sender=HashTag)
+def invalidate_hashtag_index(sender, instance, **kwargs):
+    bump_hashtag_version()
+
+@receiver(post_save, sender=HashTag)
+def add_hashtag_to_index(sender, instance, created, **kwargs):
+    if created:
+        log_change('tag', tag_id=instance.id, name=instance.name)
+
+@receiver(post_save, sender=PhotoHashTag)
+def add_photo_to_posting(sender, instance, created, **kwargs):
+    if created and instance.photo_id and instance.hashtag_id:
+        log_change('add', instance.photo_id, instance.hashtag_id, instance.hashtag.name)
+
+@receiver(post_delete, sender=PhotoHashTag)
+def remove_photo_from_posting(sender, instance, **kwargs):
+    if instance.photo_id and instance.hashtag_id:
+        log_change('remove', instance.photo_id, instance.hashtag_id)
+
+@receiver(post_save, sender=Photo)
+def update_photo_facets(sender, instance, **kwargs):
+    log_change('photo', instance.id, name=json.dumps(photo_facets(instance)))
+
+@receiver(post_delete, sender=Photo)
+def drop_photo_from_postings(sender, instance, **kwargs):
+    log_change('drop_photo', instance.id)
+
+@receiver(post_delete, sender=HashTag)
+def drop_hashtag_posting(sender, instance, **kwargs):
+    log_change('drop_tag', tag_id=instance.id, name=instance.name)
@@ -0,0 +1,90 @@
+import json
+import math
+import time
+import threading
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config   import Config
+
+from django.conf  import settings
+from django_redis import get_redis_connection
+
+from my_settings import AWS_S3
+
+BUCKET        = 'weplash'
+METRICS_KEY   = 'upload_metrics'
+METRICS_LIMIT = 1000
+BATCH_WORKERS = 8
+
+s3_client_lock  = threading.Lock()
+s3_client       = None
+transfer_config = TransferConfig(
+    multipart_threshold = settings.S3_TRANSFER['multipart_threshold'],
+    multipart_chunksize = settings.S3_TRANSFER['multipart_chunksize'],
+    max_concurrency     = settings.S3_TRANSFER['max_concurrency'],
+    use_threads         = True
+)
+# Batch uploads already run BATCH_WORKERS files at once on the same client, so each
+# transfer gets a share of the connection pool instead of the full max_concurrency.
+batch_transfer_config = TransferConfig(
+    multipart_threshold = settings.S3_TRANSFER['multipart_threshold'],
+    multipart_chunksize = settings.S3_TRANSFER['multipart_chunksize'],
+    max_concurrency     = max(settings.S3_TRANSFER['max_pool_connections'] // BATCH_WORKERS, 1),
+    use_threads         = True
+)
+
+def get_s3_client():
+    global s3_client
+    if s3_client is None:
+        with s3_client_lock:
+            if s3_client is None:
+                s3_client = boto3.session.Session().client(
+                    's3',
+                    aws_access_key_id     = AWS_S3['access_key'],
+                    aws_secret_access_key = AWS_S3['secret_access_key'],
+                    config                = Config(max_pool_connections=settings.S3_TRANSFER['max_pool_connections'])
+                )
+    return s3_client
+
+def count_parts(size):
+    if size < transfer_config.multipart_threshold:
+        return 1
+    return math.ceil(size / transfer_config.multipart_chunksize)
+
+def record_upload(size, seconds):
+    sample = json.dumps({
+        "bytes"   : size,
+        "seconds" : seconds,
+        "parts"   : count_parts(size)
+    })
+    pipe = get_redis_connection('default').pipeline()
+    pipe.lpush(METRICS_KEY, sample)
+    pipe.ltrim(METRICS_KEY, 0, METRICS_LIMIT - 1)
+    pipe.execute()
+
+def upload_file(fileobj, key, content_type, config=transfer_config):
+    started = time.monotonic()
+    get_s3_client().upload_fileobj(
+        fileobj,
+        BUCKET,
+        key,
+        ExtraArgs = {"ContentType" : content_type},
+        Config    = config
+    )
+    record_upload(fileobj.size, time.monotonic() - started)
+
+def get_upload_stats():
+    samples = [json.loads(sample) for sample in get_redis_connection('default').lrange(METRICS_KEY, 0, -1)]
+    size    = sum(sample['bytes'] for sample in samples)
+    seconds = sum(sample['seconds'] for sample in samples)
+    return {
+        "uploads"             : len(samples),
+        "bytes"               : size,
+        "seconds"             : seconds,
+        "throughput"          : size / seconds if seconds else 0,
+        "parts"               : sum(sample['parts'] for sample in samples) / len(samples) if samples else 0,
+        "multipart_chunksize" : transfer_config.multipart_chunksize,
+        "max_concurrency"     : transfer_config.max_concurrency,
+        "samples"             : samples
+    }
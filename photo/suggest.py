@@ -0,0 +1,253 @@
+import bisect
+import heapq
+import json
+import threading
+import time
+
+import numpy as np
+
+from django.core.cache import cache
+from django.db         import connection
+from django.db.models  import Count
+
+from .models     import HashTag
+from .change_log import (
+    LOG_LIMIT,
+    log_seq,
+    read_log
+)
+
+HASHTAG_VERSION_KEY = 'hashtag_version'
+INDEX_TTL           = 60 * 10
+LOG_CHECK           = 1
+EXTRA_LIMIT         = 1000
+PREFIX_CACHE_LENGTH = 2
+SUGGEST_LIMIT       = 20
+FUZZY_MIN_LENGTH    = 3
+SIMILARITY_MIN      = 0.3
+POPULARITY_WEIGHT   = 0.1
+
+def trigrams(term):
+    padded = f'  {term} '
+    return {padded[i:i+3] for i in range(len(padded) - 2)}
+
+def get_hashtag_version():
+    version = cache.get(HASHTAG_VERSION_KEY)
+    if version is None:
+        cache.add(HASHTAG_VERSION_KEY, str(time.time_ns()), None)
+        version = cache.get(HASHTAG_VERSION_KEY)
+    return version
+
+def bump_hashtag_version():
+    cache.set(HASHTAG_VERSION_KEY, str(time.time_ns()), None)
+
+class TagSnapshot:
+    def __init__(self, seq, rows):
+        self.seq      = seq
+        self.built_at = time.monotonic()
+        self.keys     = [name.lower() for name, _, _ in rows]
+        self.names    = [name for name, _, _ in rows]
+        self.counts   = [count for _, _, count in rows]
+        self.by_name  = {name : index for index, name in enumerate(self.names)}
+        self.indexes  = {tag_id : index for index, (_, tag_ids, _) in enumerate(rows) for tag_id in tag_ids}
+        self.extra    = []
+        self.deleted  = set()
+
+        self.top = {}
+        for index, key in enumerate(self.keys):
+            for length in range(1, min(len(key), PREFIX_CACHE_LENGTH) + 1):
+                self.top.setdefault(key[:length], []).append(index)
+        for prefix, indexes in self.top.items():
+            self.top[prefix] = self.rank(indexes, SUGGEST_LIMIT)
+
+        grams      = {}
+        gram_sizes = []
+        for index, key in enumerate(self.keys):
+            key_grams = trigrams(key)
+            gram_sizes.append(len(key_grams))
+            for gram in key_grams:
+                grams.setdefault(gram, []).append(index)
+        self.grams      = {gram : np.array(indexes, dtype=np.int32) for gram, indexes in grams.items()}
+        self.gram_sizes = np.array(gram_sizes, dtype=np.int32)
+        self.log_max    = np.log1p(max(self.counts, default=0))
+        counts          = np.array(self.counts, dtype=np.float64)
+        self.popularity = np.log1p(counts) / self.log_max if self.log_max else np.zeros(len(counts))
+
+    @classmethod
+    def build(cls):
+        # Read the log position before the table, so an entry committed in between
+        # is applied on top; counts only rank suggestions, so that overlap is harmless.
+        seq  = log_seq()
+        rows = {}
+        for tag_id, name, count in HashTag.objects.annotate(
+            count = Count('photohashtag')
+        ).values_list('id', 'name', 'count'):
+            tag_ids, total = rows.get(name, ([], 0))
+            tag_ids.append(tag_id)
+            rows[name] = (tag_ids, total + count)
+        return cls(seq, [
+            (name, tag_ids, count)
+            for name, (tag_ids, count) in sorted(rows.items(), key=lambda row: (row[0].lower(), row[0]))
+        ])
+
+    def rank(self, indexes, limit):
+        return heapq.nsmallest(
+            limit,
+            (index for index in indexes if index not in self.deleted),
+            key = lambda index: (-self.counts[index], self.order(index))
+        )
+
+    def order(self, index):
+        return (self.names[index].lower(), self.names[index])
+
+    def promote(self, index):
+        key = self.names[index].lower()
+        for length in range(1, min(len(key), PREFIX_CACHE_LENGTH) + 1):
+            prefix           = key[:length]
+            self.top[prefix] = self.rank(set(self.top.get(prefix, [])) | {index}, SUGGEST_LIMIT)
+
+    def add(self, tag_id, name):
+        index = self.by_name.get(name)
+        if index is None:
+            index = len(self.names)
+            self.names.append(name)
+            self.counts.append(0)
+            self.by_name[name] = index
+            self.extra.append(index)
+        self.indexes[tag_id] = index
+        self.deleted.discard(index)
+        return index
+
+    def apply(self, entries):
+        for op, _, tag_id, name in map(json.loads, entries):
+            index = self.indexes.get(tag_id)
+            if op in ('tag', 'add'):
+                if index is None:
+                    index = self.add(tag_id, name)
+                if op == 'add':
+                    self.counts[index] += 1
+                self.promote(index)
+            elif op == 'remove' and index is not None:
+                self.counts[index] = max(self.counts[index] - 1, 0)
+            elif op == 'drop_tag' and index is not None:
+                self.deleted.add(index)
+
+    def popularity_of(self, index):
+        if index < len(self.popularity):
+            return self.popularity[index]
+        return min(np.log1p(self.counts[index]) / self.log_max, 1.0) if self.log_max else 0.0
+
+    def suggest(self, prefix, limit):
+        if len(prefix) <= PREFIX_CACHE_LENGTH:
+            return self.rank(self.top.get(prefix, []), limit)
+
+        low  = bisect.bisect_left(self.keys, prefix)
+        high = bisect.bisect_left(self.keys, prefix + '\uffff')
+        return self.rank(
+            list(range(low, high)) + [index for index in self.extra if self.names[index].lower().startswith(prefix)],
+            limit
+        )
+
+    def fuzzy(self, term, limit):
+        grams  = trigrams(term)
+        scored = []
+
+        lists = [self.grams[gram] for gram in grams if gram in self.grams]
+        if lists:
+            shared     = np.bincount(np.concatenate(lists), minlength=len(self.keys))
+            candidates = np.nonzero(shared)[0]
+            similarity = shared[candidates] / (len(grams) + self.gram_sizes[candidates] - shared[candidates])
+            keep       = similarity >= SIMILARITY_MIN
+            candidates = candidates[keep]
+            score      = similarity[keep] + POPULARITY_WEIGHT * self.popularity[candidates]
+            scored     = list(zip(score.tolist(), candidates.tolist()))
+
+        for index in self.extra:
+            key_grams  = trigrams(self.names[index].lower())
+            shared     = len(grams & key_grams)
+            similarity = shared / (len(grams) + len(key_grams) - shared)
+            if similarity >= SIMILARITY_MIN:
+                scored.append((similarity + POPULARITY_WEIGHT * self.popularity_of(index), index))
+
+        scored.sort(key=lambda item: (-item[0], self.order(item[1])))
+        return [index for _, index in scored if index not in self.deleted][:limit]
+
+    def exists(self, key):
+        low = bisect.bisect_left(self.keys, key)
+        if low < len(self.keys) and self.keys[low] == key and low not in self.deleted:
+            return True
+        return any(self.names[index].lower() == key for index in self.extra if index not in self.deleted)
+
+class TagIndex:
+    def __init__(self):
+        self.snapshot   = None
+        self.checked_at = 0
+        self.rebuilding = False
+        self.lock       = threading.Lock()
+
+    def rebuild(self):
+        try:
+            self.snapshot = TagSnapshot.build()
+        finally:
+            self.rebuilding = False
+            connection.close()
+
+    def refresh(self):
+        if self.snapshot is None:
+            with self.lock:
+                if self.snapshot is None:
+                    self.snapshot   = TagSnapshot.build()
+                    self.checked_at = time.monotonic()
+            return self.snapshot
+
+        snapshot = self.snapshot
+        now      = time.monotonic()
+        if now - self.checked_at < LOG_CHECK or not self.lock.acquire(blocking=False):
+            return snapshot
+        try:
+            self.checked_at      = now
+            seq, entries, needed = read_log(snapshot.seq)
+            if needed > LOG_LIMIT or needed < 0:
+                self.start_rebuild()
+            elif entries:
+                snapshot.apply(entries)
+                snapshot.seq = seq
+            if now - snapshot.built_at > INDEX_TTL or len(snapshot.extra) > EXTRA_LIMIT:
+                self.start_rebuild()
+        finally:
+            self.lock.release()
+        return snapshot
+
+    def start_rebuild(self):
+        if not self.rebuilding:
+            self.rebuilding = True
+            threading.Thread(target=self.rebuild, daemon=True).start()
+
+    def suggest(self, prefix, limit):
+        snapshot = self.refresh()
+        prefix   = prefix.lower()
+        if not prefix:
+            return []
+        return [snapshot.names[index] for index in snapshot.suggest(prefix, limit)]
+
+    def fuzzy(self, term, limit):
+        snapshot = self.refresh()
+        term     = term.lower()
+        if len(term) < FUZZY_MIN_LENGTH:
+            return []
+        return [snapshot.names[index] for index in snapshot.fuzzy(term, limit)]
+
+    def complete(self, term, limit):
+        names = self.suggest(term, limit)
+        if len(names) < limit:
+            names += [name for name in self.fuzzy(term, limit) if name not in names][:limit - len(names)]
+        return names
+
+    def correct(self, term):
+        snapshot = self.refresh()
+        if snapshot.exists(term.lower()):
+            return term
+        matches = self.fuzzy(term, 1)
+        return matches[0] if matches else term
+
+tag_index = TagIndex()
@@ -15,6 +15,18 @@ from .models        import (
     HashTag,
     PhotoHashTag
 )
+from .              import (
+    timeline,
+    related,
+    cooccurrence,
+    derivatives
+)
+from .colors        import add_photo_color
+from .manifest      import bump_manifest_version
+from .counters      import (
+    view_counter,
+    download_counter
+)
 
 @task(name='upload_file', ignore_result=True)
 def upload_image(photo_url):
@@ -23,6 +35,7 @@ def upload_image(photo_url):
 
     get_image_hashtag.delay(photo_url, auth_key, auth_secret)
     get_image_color.delay(photo_url, auth_key, auth_secret)
+    generate_derivatives.delay(photo_url)
 
 @task(name='get_image_hashtag', ignore_result=True)
 def get_image_hashtag(photo_url, auth_key, auth_secret):
@@ -31,19 +44,25 @@ def get_image_hashtag(photo_url, auth_key, auth_secret):
         'https://api.imagga.com/v2/tags?image_url=%s' % photo_url,
         auth = (auth_key, auth_secret))
 
+        photo      = Photo.objects.get(image = photo_url)
+        photo_tags = set(PhotoHashTag.objects.filter(photo=photo).values_list('hashtag_id', flat=True))
+        attached   = []
         for tag in response.json()['result']['tags']:
             if tag['confidence'] > 30:
                 if HashTag.objects.filter(name=tag['tag']['en']).exists():
-                    PhotoHashTag.objects.create(
-                        photo   = Photo.objects.get(image = photo_url),
-                        hashtag = HashTag.objects.get(name=tag['tag']['en'])
-                    )
+                    hashtag = HashTag.objects.get(name=tag['tag']['en'])
                 else:
                     hashtag = HashTag.objects.create(name=tag['tag']['en'])
-                    PhotoHashTag.objects.create(
-                        photo   = Photo.objects.get(image = photo_url),
-                        hashtag = hashtag
-                    )
+                if hashtag.id in photo_tags:
+                    continue
+                PhotoHashTag.objects.create(
+                    photo   = photo,
+                    hashtag = hashtag
+                )
+                photo_tags.add(hashtag.id)
+                attached.append(hashtag.id)
+        cooccurrence.add_photo_tags(photo.id, attached)
+        refresh_related_photos.delay(photo.id)
     except KeyError:
         pass
 
@@ -64,6 +83,49 @@ def get_image_color(photo_url, auth_key, auth_secret):
             back_ground_color = BackGroundColor.objects.create(name=color)
             photo.background_color = back_ground_color
 
-        photo.save()
+        photo.save(update_fields=['background_color'])
+        add_photo_color(photo.id, color)
+        bump_manifest_version()
     except KeyError:
         pass
+
+@task(name='fan_out_photo', ignore_result=True)
+def fan_out_photo(photo_id, author_id):
+    timeline.push_photo(photo_id, author_id)
+
+@task(name='update_timeline', ignore_result=True)
+def update_timeline(user_id, followee_id, status):
+    if status:
+        timeline.follow(user_id, followee_id)
+    else:
+        timeline.unfollow(user_id, followee_id)
+
+@task(name='refresh_related_photos', ignore_result=True)
+def refresh_related_photos(photo_id):
+    related.refresh_related_photos(photo_id)
+
+@task(name='flush_photo_views', ignore_result=True)
+def flush_photo_views():
+    view_counter.flush()
+
+@task(name='flush_photo_downloads', ignore_result=True)
+def flush_photo_downloads():
+    download_counter.flush()
+
+@task(name='rebuild_tag_cooccurrence', ignore_result=True)
+def rebuild_tag_cooccurrence():
+    cooccurrence.rebuild_cooccurrence()
+
+@task(name='upload_images', ignore_result=True)
+def upload_images(photo_urls):
+    for photo_url in photo_urls:
+        upload_image(photo_url)
+
+@task(name='fan_out_photos', ignore_result=True)
+def fan_out_photos(photo_ids, author_id):
+    for photo_id in photo_ids:
+        timeline.push_photo(photo_id, author_id)
+
+@task(name='generate_derivatives', ignore_result=True)
+def generate_derivatives(photo_url):
+    derivatives.generate_derivatives(photo_url)
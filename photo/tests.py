@@ -1,5 +1,15 @@
+import io
 import json
+import jwt
+import boto3
 
+from PIL           import Image
+from moto          import mock_s3
+from unittest.mock import patch
+
+from my_settings                    import SECRET_KEY, ALGORITHM, AWS_S3
+from django.core.cache              import cache
+from django_redis                   import get_redis_connection
 from django.db.models               import Q
 from django.test                    import (
     TestCase,
@@ -20,7 +30,64 @@ from .models import (
     HashTag,
     PhotoHashTag,
     PhotoCollection,
-    BackGroundColor
+    BackGroundColor,
+    Timeline,
+    TagCooccurrence
+)
+from .timeline import (
+    push_photo,
+    unfollow,
+    rebuild_timeline
+)
+from .cards import (
+    card_key,
+    get_cards
+)
+from .counters import (
+    view_counter,
+    download_counter,
+    downloader_counter
+)
+from .colors import (
+    color_index,
+    similar_to_color
+)
+from .suggest import tag_index
+from .search_index import posting_index
+from .manifest import bump_manifest_version
+from .tasks import get_image_color
+from .images import read_image_meta
+from .derivatives import (
+    render_derivatives,
+    generate_derivatives
+)
+from .storage import (
+    METRICS_KEY,
+    BATCH_WORKERS,
+    batch_transfer_config,
+    get_s3_client,
+    count_parts,
+    upload_file,
+    get_upload_stats
+)
+from .cooccurrence import (
+    rebuild_cooccurrence,
+    add_photo_tags
+)
+from .leaderboard import leaderboard_key
+from .related import (
+    related_key,
+    compute_related_photos,
+    refresh_related_photos,
+    get_related_photos
+)
+from .category_feed import (
+    category_feed_key,
+    category_build_key,
+    build_category_feed,
+    get_category_feed,
+    get_category_page,
+    update_category_feed
 )
 
 class RelatedPhotoViewTest(TestCase):
@@ -80,6 +147,9 @@ class RelatedPhotoViewTest(TestCase):
                 "user_last_name"     : "last",
                 "user_name"          : "test",
                 "user_profile_image" : None,
+                "width"              : None,
+                "height"             : None,
+                "srcset"             : {},
                 "user_like"          : False,
                 "user_collection"    : False
             }]})
@@ -159,6 +229,7 @@ class RelatedCollectionViewTest(TestCase):
                 {
                     "id"              : 1,
                     "image"           : ["image"],
+                    "srcset"          : [{}],
                     "name"            : "collection",
                     "photos_number"   : 1,
                     "user_first_name" : "first",
@@ -285,6 +356,277 @@ class UploadViewTest(TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {"message" : "KEY_ERROR"})
 
+    def test_uploadview_invalid_image(self):
+        client = Client()
+        header = {'HTTP_Authorization' : jwt.encode({'user_id':5}, SECRET_KEY, algorithm=ALGORITHM).decode('utf-8')}
+        upload_file = {
+            'location' : 'test',
+            'filename' : SimpleUploadedFile(name='dog.jpeg', content=b'not an image', content_type='image/jpeg')
+        }
+        response = client.post('/photo/upload', upload_file, **header)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"message" : "INVALID_IMAGE"})
+
+class UploadFlowTest(TestCase):
+    def setUp(self):
+        self.s3 = mock_s3()
+        self.s3.start()
+        weplash = User.objects.create(id=1, first_name='we', last_name='plash', user_name='weplash', email='weplash@weplash.com')
+        User.objects.create(id=2, first_name='first', last_name='last', user_name='testuser', email='test@test.com')
+        Collection.objects.create(id=1, user=weplash, name='Nature')
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='weplash')
+        self.header = {'HTTP_Authorization' : jwt.encode({'user_id':2}, SECRET_KEY, algorithm=ALGORITHM).decode('utf-8')}
+
+    def tearDown(self):
+        self.s3.stop()
+        PhotoCollection.objects.all().delete()
+        PhotoHashTag.objects.all().delete()
+        HashTag.objects.all().delete()
+        Photo.objects.all().delete()
+        Collection.objects.all().delete()
+        User.objects.all().delete()
+
+    def init_upload(self, category='Nature'):
+        body = {'location' : 'Seoul', 'category' : category, 'content_type' : 'image/png'}
+        return self.client.post('/photo/upload/init', json.dumps(body), content_type='application/json', **self.header)
+
+    def complete_upload(self, upload_id):
+        body = {'upload_id' : upload_id}
+        return self.client.post('/photo/upload/complete', json.dumps(body), content_type='application/json', **self.header)
+
+    @patch('photo.uploads.fan_out_photo')
+    @patch('photo.uploads.upload_image')
+    def test_upload_flow_success(self, upload_image, fan_out_photo):
+        response = self.init_upload()
+        self.assertEqual(response.status_code, 200)
+        upload = response.json()['data']
+        self.assertEqual(upload['fields']['Content-Type'], 'image/png')
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (30, 10)).save(buffer, 'PNG')
+        boto3.client('s3', region_name='us-east-1').put_object(Bucket='weplash', Key=upload['fields']['key'], Body=buffer.getvalue())
+
+        response = self.complete_upload(upload['upload_id'])
+        self.assertEqual(response.status_code, 200)
+        photo = Photo.objects.get(id=response.json()['data']['id'])
+        self.assertEqual((photo.user_id, photo.location, photo.width, photo.height), (2, 'Seoul', 30, 10))
+        self.assertTrue(PhotoHashTag.objects.filter(photo=photo, hashtag__name='Seoul').exists())
+        self.assertTrue(PhotoCollection.objects.filter(photo=photo, collection_id=1).exists())
+        upload_image.delay.assert_called_once_with(photo.image)
+
+        response = self.complete_upload(upload['upload_id'])
+        self.assertEqual(response.json(), {'message' : 'INVALID_UPLOAD'})
+
+    @patch('photo.uploads.fan_out_photo')
+    @patch('photo.uploads.upload_image')
+    def test_upload_flow_large_header(self, upload_image, fan_out_photo):
+        upload = self.init_upload().json()['data']
+        buffer = io.BytesIO()
+        Image.effect_noise((200, 100), 64).convert('RGB').save(buffer, 'JPEG', icc_profile=bytes(200 * 1024))
+        boto3.client('s3', region_name='us-east-1').put_object(Bucket='weplash', Key=upload['fields']['key'], Body=buffer.getvalue())
+
+        response = self.complete_upload(upload['upload_id'])
+        self.assertEqual(response.status_code, 200)
+        photo = Photo.objects.get(id=response.json()['data']['id'])
+        self.assertEqual((photo.width, photo.height), (200, 100))
+
+    def test_upload_flow_not_image(self):
+        upload = self.init_upload().json()['data']
+        boto3.client('s3', region_name='us-east-1').put_object(Bucket='weplash', Key=upload['fields']['key'], Body=bytes(100 * 1024))
+
+        response = self.complete_upload(upload['upload_id'])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'INVALID_IMAGE'})
+        self.assertFalse(Photo.objects.exists())
+
+    def test_upload_flow_not_uploaded(self):
+        upload   = self.init_upload().json()['data']
+        response = self.complete_upload(upload['upload_id'])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'UPLOAD_NOT_FOUND'})
+        self.assertFalse(Photo.objects.exists())
+
+    def test_upload_flow_invalid_category(self):
+        response = self.init_upload(category='Unknown')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'INVALID_CATEGORY'})
+
+class BatchUploadViewTest(TestCase):
+    def setUp(self):
+        self.s3 = mock_s3()
+        self.s3.start()
+        weplash = User.objects.create(id=1, first_name='we', last_name='plash', user_name='weplash', email='weplash@weplash.com')
+        User.objects.create(id=2, first_name='first', last_name='last', user_name='testuser', email='test@test.com')
+        Collection.objects.create(id=1, user=weplash, name='Nature')
+        Collection.objects.create(id=2, user=weplash, name='Travel')
+        HashTag.objects.create(id=1, name='Seoul')
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='weplash')
+        self.header = {'HTTP_Authorization' : jwt.encode({'user_id':2}, SECRET_KEY, algorithm=ALGORITHM).decode('utf-8')}
+
+    def tearDown(self):
+        self.s3.stop()
+        PhotoCollection.objects.all().delete()
+        PhotoHashTag.objects.all().delete()
+        TagCooccurrence.objects.all().delete()
+        HashTag.objects.all().delete()
+        Photo.objects.all().delete()
+        Collection.objects.all().delete()
+        User.objects.all().delete()
+
+    def make_file(self, name, size):
+        buffer = io.BytesIO()
+        Image.new('RGB', size).save(buffer, 'PNG')
+        return SimpleUploadedFile(name=name, content=buffer.getvalue(), content_type='image/png')
+
+    @patch('photo.uploads.fan_out_photos')
+    @patch('photo.uploads.upload_images')
+    def test_batchuploadview_success(self, upload_images, fan_out_photos):
+        files    = [
+            self.make_file('a.png', (30, 10)),
+            self.make_file('b.png', (10, 30)),
+            SimpleUploadedFile(name='c.png', content=b'not an image'),
+            self.make_file('d.png', (10, 10))
+        ]
+        metadata = [
+            {'location' : 'Seoul', 'category' : 'Nature'},
+            {'location' : 'Busan', 'category' : 'Travel'},
+            {'location' : 'Seoul', 'category' : 'Nature'},
+            {'location' : 'Seoul', 'category' : 'Unknown'}
+        ]
+        response = self.client.post('/photo/upload/batch', {'files' : files, 'metadata' : json.dumps(metadata)}, **self.header)
+        self.assertEqual(response.status_code, 200)
+
+        results = response.json()['data']
+        self.assertEqual([result['result'] for result in results], ['UPLOADED', 'UPLOADED', 'INVALID_IMAGE', 'INVALID_CATEGORY'])
+        first, second = Photo.objects.get(id=results[0]['id']), Photo.objects.get(id=results[1]['id'])
+        self.assertEqual((first.width, first.height, first.user_id), (30, 10, 2))
+        self.assertEqual(list(first.hashtag.values_list('name', flat=True)), ['Seoul'])
+        self.assertEqual(list(second.hashtag.values_list('name', flat=True)), ['Busan'])
+        self.assertEqual(HashTag.objects.filter(name='Seoul').count(), 1)
+        self.assertEqual(Collection.objects.get(id=1).photo_count, 1)
+        self.assertEqual(Collection.objects.get(id=2).photo_count, 1)
+        self.assertEqual(TagCooccurrence.objects.get(hashtag_id=1, related_id=1).count, 1)
+        upload_images.delay.assert_called_once()
+        fan_out_photos.delay.assert_called_once_with(sorted([first.id, second.id]), 2)
+
+    def test_batchuploadview_invalid_metadata(self):
+        files    = [self.make_file('a.png', (30, 10))]
+        response = self.client.post('/photo/upload/batch', {'files' : files, 'metadata' : '[]'}, **self.header)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'INVALID_METADATA'})
+
+class UploadMetricsTest(TestCase):
+    def setUp(self):
+        self.s3 = mock_s3()
+        self.s3.start()
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='weplash')
+        get_redis_connection('default').delete(METRICS_KEY)
+
+    def tearDown(self):
+        self.s3.stop()
+
+    def test_s3_client_is_shared(self):
+        self.assertIs(get_s3_client(), get_s3_client())
+
+    def test_upload_file_records_metrics(self):
+        content = b'x' * 1024
+        upload_file(SimpleUploadedFile(name='image', content=content), 'key', 'image/jpeg')
+
+        body = boto3.client('s3', region_name='us-east-1').get_object(Bucket='weplash', Key='key')['Body'].read()
+        self.assertEqual(body, content)
+
+        stats = get_upload_stats()
+        self.assertEqual((stats['uploads'], stats['bytes'], stats['parts']), (1, 1024, 1))
+        self.assertEqual(count_parts(20 * 1024 * 1024), 3)
+
+    def test_batch_transfer_fits_pool(self):
+        pool = get_s3_client().meta.config.max_pool_connections
+        self.assertLessEqual(batch_transfer_config.max_concurrency * BATCH_WORKERS, pool)
+
+class DerivativeTest(TestCase):
+    def setUp(self):
+        self.s3 = mock_s3()
+        self.s3.start()
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='weplash')
+        User.objects.create(id=1, first_name='first', last_name='last', user_name='testuser', email='test@test.com')
+
+    def tearDown(self):
+        self.s3.stop()
+        Photo.objects.all().delete()
+        User.objects.all().delete()
+
+    def make_jpeg(self, size, orientation=None):
+        buffer = io.BytesIO()
+        image  = Image.new('RGB', size, (200, 100, 50))
+        if orientation:
+            exif = image.getexif()
+            exif[0x0112] = orientation
+            image.save(buffer, 'JPEG', exif=exif.tobytes())
+        else:
+            image.save(buffer, 'JPEG')
+        return buffer.getvalue()
+
+    def test_render_derivatives(self):
+        rendered = render_derivatives(self.make_jpeg((1000, 500)))
+        self.assertEqual(sorted(rendered), [
+            (200, 'jpeg'), (200, 'webp'), (400, 'jpeg'), (400, 'webp'), (800, 'jpeg'), (800, 'webp')
+        ])
+        with Image.open(io.BytesIO(rendered[(400, 'webp')])) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (400, 200)))
+
+    def test_render_derivatives_rotated(self):
+        rendered = render_derivatives(self.make_jpeg((500, 300), orientation=6))
+        self.assertEqual(sorted({width for width, _ in rendered}), [200])
+        with Image.open(io.BytesIO(rendered[(200, 'jpeg')])) as image:
+            self.assertEqual(image.size, (200, 333))
+
+    def test_generate_derivatives(self):
+        image = AWS_S3['url'] + 'photo'
+        Photo.objects.create(id=1, user_id=1, image=image, width=500, height=250)
+        boto3.client('s3', region_name='us-east-1').put_object(Bucket='weplash', Key='photo', Body=self.make_jpeg((500, 250)))
+
+        self.assertEqual(generate_derivatives(image), '200,400')
+        s3_object = boto3.client('s3', region_name='us-east-1').get_object(Bucket='weplash', Key='photo_400.webp')
+        self.assertEqual(s3_object['ContentType'], 'image/webp')
+        self.assertEqual(get_cards([1])[0]['srcset'], {
+            "webp" : {"200" : image + '_200.webp', "400" : image + '_400.webp'},
+            "jpeg" : {"200" : image + '_200.jpg', "400" : image + '_400.jpg'}
+        })
+
+class ImageMetaTest(TestCase):
+    def make_image(self, size, image_format, orientation=None):
+        buffer = io.BytesIO()
+        image  = Image.new('RGB', size)
+        if orientation:
+            exif = image.getexif()
+            exif[0x0112] = orientation
+            image.save(buffer, image_format, exif=exif.tobytes())
+        else:
+            image.save(buffer, image_format)
+        return SimpleUploadedFile(name='image', content=buffer.getvalue())
+
+    def test_read_image_meta(self):
+        image_file = self.make_image((40, 20), 'PNG')
+        meta       = read_image_meta(image_file)
+        self.assertEqual(meta, {
+            "width"        : 40,
+            "height"       : 20,
+            "format"       : 'PNG',
+            "orientation"  : 1,
+            "content_type" : 'image/png'
+        })
+        self.assertEqual(image_file.tell(), 0)
+
+    def test_read_image_meta_rotated(self):
+        meta = read_image_meta(self.make_image((40, 20), 'JPEG', orientation=6))
+        self.assertEqual((meta['width'], meta['height'], meta['orientation']), (20, 40, 6))
+
+    def test_read_image_meta_truncated_png(self):
+        buffer = io.BytesIO()
+        Image.effect_noise((2000, 1000), 64).save(buffer, 'PNG')
+        meta = read_image_meta(io.BytesIO(buffer.getvalue()[:4096]))
+        self.assertEqual((meta['width'], meta['height'], meta['orientation']), (2000, 1000, 1))
+
 class PhotoViewTest(TestCase):
     def setUp(self):
         client = Client()
@@ -343,10 +685,36 @@ class PhotoViewTest(TestCase):
             'user_profile_image': 'url',
             'width'             : 1000,
             'height'            : 667,
+            'srcset'            : {},
             'user_like'         : False,
             'user_collection'   : False
             }]})
 
+    def test_PhotoView_cursor_success(self):
+        Photo.objects.create(
+            id       = 2,
+            user_id  = 1,
+            image    = 'url2',
+            location = 'Seoul',
+            width    = 667,
+            height   = 1000
+        )
+        response = self.client.get('/photo?user=weplash&user_category=photos&after=&limit=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([photo['id'] for photo in response.json()['data']], [2])
+
+        next_cursor = response.json()['next_cursor']
+        response    = self.client.get(f'/photo?user=weplash&user_category=photos&after={next_cursor}&limit=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([photo['id'] for photo in response.json()['data']], [1])
+        self.assertEqual(response.json()['next_cursor'], None)
+
+    def test_PhotoView_cursor_except(self):
+        response = self.client.get('/photo?user=weplash&user_category=photos&after=!!&limit=20')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(),
+        {"message":"VALUE_ERROR"})
+
     def test_PhotoView_fail(self):
         response = self.client.get('/photouser=weplash&user_category=Nature&offset=0&limit=20')
         self.assertEqual(response.status_code, 404)
@@ -425,6 +793,92 @@ class SearchBarViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"data" : ["test"]})
 
+    def test_searchbarview_not_modified(self):
+        client   = Client()
+        response = client.get('/photo/search')
+        etag     = response['ETag']
+
+        response = client.get('/photo/search', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        HashTag.objects.create(id=2, name='new')
+        response = client.get('/photo/search', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json(), {"data" : ["new", "test"]})
+
+class SuggestTagViewTest(TestCase):
+    def setUp(self):
+        User.objects.create(id=1, first_name='first', last_name='last', user_name='testuser', email='test@test.com')
+        for photo_id in range(1, 4):
+            Photo.objects.create(id=photo_id, user_id=1, image='image')
+        HashTag.objects.create(id=1, name='dog')
+        HashTag.objects.create(id=2, name='Doghouse')
+        HashTag.objects.create(id=3, name='door')
+        HashTag.objects.create(id=4, name='cat')
+        for photo_id in range(1, 4):
+            PhotoHashTag.objects.create(photo_id=photo_id, hashtag_id=3)
+        PhotoHashTag.objects.create(photo_id=1, hashtag_id=2)
+        tag_index.snapshot = None
+
+    def tearDown(self):
+        PhotoHashTag.objects.all().delete()
+        HashTag.objects.all().delete()
+        Photo.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_suggesttagview_ranked_by_count(self):
+        client   = Client()
+        response = client.get('/photo/search/suggest?q=do')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"data" : ["door", "Doghouse", "dog"]})
+
+        response = client.get('/photo/search/suggest?q=DOG&k=1')
+        self.assertEqual(response.json(), {"data" : ["Doghouse"]})
+
+    def test_suggesttagview_new_tag(self):
+        client = Client()
+        client.get('/photo/search/suggest?q=ca')
+        HashTag.objects.create(id=5, name='camera')
+        tag_index.snapshot.apply([json.dumps(['tag', 0, 5, 'camera'])])
+
+        response = client.get('/photo/search/suggest?q=ca')
+        self.assertEqual(response.json(), {"data" : ["camera", "cat"]})
+
+    def test_suggesttagview_incremental(self):
+        client = Client()
+        client.get('/photo/search/suggest?q=do')
+        tag_index.snapshot.apply([
+            json.dumps(['add', 1, 6, 'dolphin']),
+            json.dumps(['add', 2, 6, 'dolphin']),
+            json.dumps(['add', 3, 6, 'dolphin']),
+            json.dumps(['add', 2, 1, 'dog']),
+            json.dumps(['drop_tag', 0, 3, 'door'])
+        ])
+
+        response = client.get('/photo/search/suggest?q=do')
+        self.assertEqual(response.json(), {"data" : ["dolphin", "dog", "Doghouse"]})
+        response = client.get('/photo/search/suggest?q=dolp')
+        self.assertEqual(response.json(), {"data" : ["dolphin"]})
+        self.assertEqual(tag_index.correct('dolphni'), 'dolphin')
+
+    def test_suggesttagview_typo(self):
+        HashTag.objects.create(id=5, name='mountain')
+        HashTag.objects.create(id=6, name='fountain')
+        PhotoHashTag.objects.create(photo_id=1, hashtag_id=5)
+        tag_index.snapshot = None
+
+        client   = Client()
+        response = client.get('/photo/search/suggest?q=moutain&k=2')
+        self.assertEqual(response.json(), {"data" : ["mountain"]})
+        self.assertEqual(tag_index.correct('doorr'), 'door')
+        self.assertEqual(tag_index.correct('Dog'), 'Dog')
+
+    def test_suggesttagview_invalid_limit(self):
+        client   = Client()
+        response = client.get('/photo/search/suggest?q=do&k=abc')
+        self.assertEqual(response.status_code, 400)
+
 class UserCardVIewTest(TestCase):
     def setUp(self):
         User.objects.create(
@@ -557,3 +1011,844 @@ class RelatedPhotoBackGroundColorVIewTest(TestCase):
         response = client.get('/photo/back/related-photo/one')
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {"message" : "VALUE_ERROR"})
+
+class ViewerStateViewTest(TestCase):
+    def setUp(self):
+        user = User.objects.create(
+            id         = 1,
+            first_name = 'first',
+            last_name  = 'last',
+            user_name  = 'test',
+            email      = 'test@test.com',
+            password   = '123456'
+        )
+        Photo.objects.bulk_create([
+            Photo(id=1, user=user, image='image'),
+            Photo(id=2, user=user, image='image2')
+        ])
+        Like.objects.create(user=user, photo_id=1)
+        collection = Collection.objects.create(id=1, user=user, name='collection')
+        PhotoCollection.objects.create(photo_id=2, collection=collection)
+
+    def tearDown(self):
+        PhotoCollection.objects.all().delete()
+        Collection.objects.all().delete()
+        Like.objects.all().delete()
+        Photo.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_viewerstateview_success(self):
+        client = Client()
+        header = {'HTTP_Authorization' : jwt.encode({'user_id':1}, SECRET_KEY, algorithm=ALGORITHM).decode('utf-8')}
+        response = client.get('/photo/viewer-state?ids=1,2', **header)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            "data" : [
+                {"id" : 1, "user_like" : True, "user_collection" : False},
+                {"id" : 2, "user_like" : False, "user_collection" : True}
+            ]})
+
+    def test_viewerstateview_anonymous(self):
+        client = Client()
+        response = client.get('/photo/viewer-state?ids=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            "data" : [{"id" : 1, "user_like" : False, "user_collection" : False}]
+        })
+
+    def test_viewerstateview_exception(self):
+        client = Client()
+        response = client.get('/photo/viewer-state?ids=one')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"message" : "VALUE_ERROR"})
+
+class TimelineTest(TestCase):
+    def setUp(self):
+        User.objects.bulk_create([
+            User(id=1, first_name='first', last_name='last', user_name='follower', email='test1@test.com'),
+            User(id=2, first_name='first', last_name='last', user_name='followee', email='test2@test.com')
+        ])
+        Follow.objects.create(from_user_id=1, to_user_id=2)
+        Photo.objects.bulk_create([
+            Photo(id=1, user_id=2, image='image1'),
+            Photo(id=2, user_id=2, image='image2')
+        ])
+        self.header = {'HTTP_Authorization' : jwt.encode({'user_id':1}, SECRET_KEY, algorithm=ALGORITHM).decode('utf-8')}
+
+    def tearDown(self):
+        Timeline.objects.all().delete()
+        Photo.objects.all().delete()
+        Follow.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_timeline_following_success(self):
+        rebuild_timeline(1)
+        client   = Client()
+        response = client.get('/photo?category=Following', **self.header)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([photo['id'] for photo in response.json()['data']], [2, 1])
+
+    def test_timeline_push_photo(self):
+        rebuild_timeline(1)
+        Photo.objects.create(id=3, user_id=2, image='image3')
+        push_photo(3, 2)
+        self.assertEqual(list(Timeline.objects.filter(user_id=1).order_by('-photo_id').values_list('photo_id', flat=True)), [3, 2, 1])
+
+    @patch('photo.timeline.TIMELINE_LIMIT', 2)
+    def test_timeline_push_photo_trims(self):
+        User.objects.create(id=3, first_name='first', last_name='last', user_name='follower2', email='test3@test.com')
+        Follow.objects.create(from_user_id=3, to_user_id=2)
+        rebuild_timeline(1)
+        rebuild_timeline(3)
+        Photo.objects.create(id=3, user_id=2, image='image3')
+        with self.assertNumQueries(5):
+            push_photo(3, 2)
+        for user_id in (1, 3):
+            self.assertEqual(list(Timeline.objects.filter(user_id=user_id).order_by('-photo_id').values_list('photo_id', flat=True)), [3, 2])
+
+    def test_timeline_push_photo_under_limit(self):
+        rebuild_timeline(1)
+        Photo.objects.create(id=3, user_id=2, image='image3')
+        with self.assertNumQueries(3):
+            push_photo(3, 2)
+
+    def test_timeline_unfollow(self):
+        rebuild_timeline(1)
+        unfollow(1, 2)
+        client   = Client()
+        response = client.get('/photo?category=Following', **self.header)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"data" : []})
+
+class CategoryFeedTest(TestCase):
+    def setUp(self):
+        user = User.objects.create(
+            id         = 1,
+            first_name = 'we',
+            last_name  = 'plash',
+            user_name  = 'weplash',
+            email      = 'weplash@weplash.com'
+        )
+        Photo.objects.bulk_create([
+            Photo(id=1, user=user, image='image1'),
+            Photo(id=2, user=user, image='image2'),
+            Photo(id=3, user=user, image='image3')
+        ])
+        Collection.objects.create(id=1, user=user, name='Nature')
+        PhotoCollection.objects.bulk_create([
+            PhotoCollection(photo_id=1, collection_id=1),
+            PhotoCollection(photo_id=2, collection_id=1)
+        ])
+
+    def tearDown(self):
+        get_redis_connection('default').delete(category_feed_key('Nature'), category_build_key('Nature'))
+        PhotoCollection.objects.all().delete()
+        Collection.objects.all().delete()
+        Photo.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_categoryfeed_success(self):
+        client = Client()
+        response = client.get('/photo?category=Nature&after=&limit=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([photo['id'] for photo in response.json()['data']], [2])
+
+        next_cursor = response.json()['next_cursor']
+        response    = client.get(f'/photo?category=Nature&after={next_cursor}&limit=1')
+        self.assertEqual([photo['id'] for photo in response.json()['data']], [1])
+        self.assertEqual(response.json()['next_cursor'], None)
+
+    def test_categoryfeed_incremental_update(self):
+        self.assertEqual(list(get_category_feed('Nature')), [1, 2])
+        update_category_feed('Nature', added_ids=[3], removed_ids=[1])
+        self.assertEqual(list(get_category_feed('Nature')), [2, 3])
+        self.assertEqual(get_category_page('Nature', 1, 1), ([2], None))
+
+    def test_categoryfeed_update_during_build(self):
+        redis = get_redis_connection('default')
+        redis.set(category_build_key('Nature'), 'other')
+        update_category_feed('Nature', added_ids=[3])
+        self.assertFalse(redis.exists(category_feed_key('Nature')))
+        self.assertFalse(redis.exists(category_build_key('Nature')))
+
+        with patch('photo.category_feed.category_queryset', side_effect=lambda name: (
+            update_category_feed(name, removed_ids=[1]), PhotoCollection.objects.filter(collection__name=name)
+        )[1]):
+            self.assertFalse(build_category_feed('Nature'))
+        self.assertFalse(redis.exists(category_feed_key('Nature')))
+        self.assertEqual(get_category_page('Nature', 0, 5, ''), ([2, 1], None))
+
+class PhotoCardTest(TestCase):
+    def setUp(self):
+        User.objects.create(
+            id         = 1,
+            first_name = 'first',
+            last_name  = 'last',
+            user_name  = 'test',
+            email      = 'test@test.com'
+        )
+        Photo.objects.create(id=1, user_id=1, image='image', width=200, height=100)
+
+    def tearDown(self):
+        cache.delete(card_key(1))
+        Photo.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_photocard_cached(self):
+        self.assertEqual(get_cards([1])[0]['image'], 'image')
+        Photo.objects.filter(id=1).update(image='changed')
+        self.assertEqual(get_cards([1])[0]['image'], 'image')
+
+    def test_photocard_invalidated_on_save(self):
+        get_cards([1])
+        photo       = Photo.objects.get(id=1)
+        photo.image = 'changed'
+        photo.save()
+        self.assertEqual(get_cards([1])[0]['image'], 'changed')
+
+        user           = User.objects.get(id=1)
+        user.user_name = 'renamed'
+        user.save()
+        self.assertEqual(get_cards([1])[0]['user_name'], 'renamed')
+
+class RelatedPhotoIndexTest(TestCase):
+    def setUp(self):
+        Photo.objects.bulk_create([
+            Photo(id=1, image='image1'),
+            Photo(id=2, image='image2'),
+            Photo(id=3, image='image3'),
+            Photo(id=4, image='image4')
+        ])
+        HashTag.objects.bulk_create([
+            HashTag(id=1, name='nature'),
+            HashTag(id=2, name='mountain')
+        ])
+        PhotoHashTag.objects.bulk_create([
+            PhotoHashTag(photo_id=1, hashtag_id=1),
+            PhotoHashTag(photo_id=1, hashtag_id=2),
+            PhotoHashTag(photo_id=2, hashtag_id=1),
+            PhotoHashTag(photo_id=3, hashtag_id=1),
+            PhotoHashTag(photo_id=3, hashtag_id=2)
+        ])
+
+    def tearDown(self):
+        cache.delete_many([related_key(photo_id) for photo_id in range(1, 5)])
+        PhotoHashTag.objects.all().delete()
+        HashTag.objects.all().delete()
+        Photo.objects.all().delete()
+
+    def test_related_ranked_by_shared_tags(self):
+        self.assertEqual(compute_related_photos(1), [3, 2])
+        self.assertEqual(compute_related_photos(1, weighted=False), [3, 2])
+        self.assertEqual(compute_related_photos(4), [])
+
+    def test_related_refresh(self):
+        self.assertEqual(get_related_photos(4), [])
+        PhotoHashTag.objects.create(photo_id=4, hashtag_id=2)
+        self.assertEqual(refresh_related_photos(4), [3, 1])
+        self.assertEqual(get_related_photos(4), [3, 1])
+
+class ViewCounterTest(TestCase):
+    def setUp(self):
+        view_counter.redis.delete(view_counter.key, view_counter.flushing_key, view_counter.flush_id_key, view_counter.lock_key)
+        Photo.objects.create(id=1, image='image', views=10)
+
+    def tearDown(self):
+        view_counter.redis.delete(view_counter.key, view_counter.flushing_key, view_counter.flush_id_key, view_counter.lock_key)
+        Photo.objects.all().delete()
+
+    def test_viewcounter_buffered(self):
+        client = Client()
+        client.get('/photo/related-photo/1')
+        client.get('/photo/related-photo/1')
+        self.assertEqual(Photo.objects.get(id=1).views, 10)
+
+        response = client.get('/photo/1/stats')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['views'], 12)
+
+    def test_viewcounter_flush(self):
+        view_counter.incr(1, 5)
+        self.assertEqual(view_counter.flush(), 1)
+        self.assertEqual(Photo.objects.get(id=1).views, 15)
+        self.assertEqual(view_counter.pending([1]), {1 : 0})
+        self.assertEqual(view_counter.flush(), 0)
+
+    def test_viewcounter_flush_once(self):
+        view_counter.incr(1, 5)
+        with patch('photo.counters.CLEAR_FLUSH', 'return 0'):
+            self.assertEqual(view_counter.flush(), 1)
+        view_counter.incr(1, 2)
+        self.assertEqual(view_counter.flush(), 0)
+        self.assertEqual(Photo.objects.get(id=1).views, 15)
+        self.assertEqual(view_counter.flush(), 1)
+        self.assertEqual(Photo.objects.get(id=1).views, 17)
+
+    def test_viewcounter_flush_locked(self):
+        view_counter.incr(1, 5)
+        view_counter.redis.set(view_counter.lock_key, 'other')
+        self.assertEqual(view_counter.flush(), 0)
+        self.assertEqual(Photo.objects.get(id=1).views, 10)
+
+class DownloadViewTest(TestCase):
+    def setUp(self):
+        download_counter.redis.delete(download_counter.key, download_counter.flushing_key, download_counter.flush_id_key, download_counter.lock_key, downloader_counter.key(1))
+        User.objects.create(id=1, first_name='first', last_name='last', user_name='test', email='test@test.com')
+        Photo.objects.create(id=1, image='image', downloads=3)
+
+    def tearDown(self):
+        download_counter.redis.delete(download_counter.key, download_counter.flushing_key, download_counter.flush_id_key, download_counter.lock_key, downloader_counter.key(1))
+        Photo.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_downloadview_success(self):
+        client = Client()
+        header = {'HTTP_Authorization' : jwt.encode({'user_id':1}, SECRET_KEY, algorithm=ALGORITHM).decode('utf-8')}
+        client.post('/photo/1/download', **header)
+        client.post('/photo/1/download', **header)
+        response = client.post('/photo/1/download', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Photo.objects.get(id=1).downloads, 3)
+
+        response = client.get('/photo/1/stats')
+        self.assertEqual(response.json()['data']['downloads'], 6)
+        self.assertEqual(response.json()['data']['unique_downloaders'], 2)
+
+        download_counter.flush()
+        self.assertEqual(Photo.objects.get(id=1).downloads, 6)
+
+    def test_downloadview_fail(self):
+        client = Client()
+        response = client.post('/photo/2/download')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"message" : "NON_EXISTING_PHOTO"})
+
+class SimilarColorViewTest(TestCase):
+    def setUp(self):
+        color_index.state = None
+        User.objects.create(id=1, first_name='first', last_name='last', user_name='test', email='test@test.com')
+        BackGroundColor.objects.bulk_create([
+            BackGroundColor(id=1, name='#ff0000'),
+            BackGroundColor(id=2, name='#f01010'),
+            BackGroundColor(id=3, name='#0000ff')
+        ])
+        Photo.objects.bulk_create([
+            Photo(id=1, user_id=1, image='red', background_color_id=1),
+            Photo(id=2, user_id=1, image='dark red', background_color_id=2),
+            Photo(id=3, user_id=1, image='blue', background_color_id=3)
+        ])
+
+    def tearDown(self):
+        color_index.state = None
+        Photo.objects.all().delete()
+        BackGroundColor.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_similarcolorview_photo(self):
+        client = Client()
+        response = client.get('/photo/color?photo=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([photo['id'] for photo in response.json()['data']], [2, 3])
+
+    def test_similarcolorview_color(self):
+        client = Client()
+        response = client.get('/photo/color?color=%230505f0&limit=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([photo['id'] for photo in response.json()['data']], [3])
+
+    def test_color_index_apply(self):
+        color_index.refresh()
+        color_index.state = color_index.apply(color_index.state, 0, [
+            json.dumps(['color', 4, 0, '#fe0101']),
+            json.dumps(['color', 3, 0, '#00ff00']),
+            json.dumps(['drop_photo', 2, 0, ''])
+        ])
+        self.assertEqual(similar_to_color('#ff0000', 3), [1, 4, 3])
+
+    @patch('photo.colors.BUCKET_THRESHOLD', 0)
+    def test_color_index_buckets(self):
+        self.assertEqual(similar_to_color('#ff0000', 1), [1])
+        self.assertEqual(similar_to_color('#0000ff', 3), [3, 2, 1])
+
+    def test_similarcolorview_invalid_limit(self):
+        client = Client()
+        response = client.get('/photo/color?color=%23ff0000&limit=-1')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"message" : "INVALID_KEY"})
+
+    def test_similarcolorview_exception(self):
+        client = Client()
+        response = client.get('/photo/color?color=red')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"message" : "VALUE_ERROR"})
+
+class ManifestViewTest(TestCase):
+    def setUp(self):
+        user = User.objects.create(id=1, first_name='we', last_name='plash', user_name='weplash', email='weplash@weplash.com')
+        BackGroundColor.objects.create(id=1, name='#C0C5CC')
+        Photo.objects.bulk_create([
+            Photo(id=1, user=user, image='image1', width=1000, height=667, background_color_id=1),
+            Photo(id=2, user=user, image='image2', width=667, height=1000)
+        ])
+        Collection.objects.bulk_create([
+            Collection(id=1, user=user, name='Nature'),
+            Collection(id=2, user=user, name='Secret', private=True)
+        ])
+        PhotoCollection.objects.bulk_create([
+            PhotoCollection(photo_id=1, collection_id=1),
+            PhotoCollection(photo_id=2, collection_id=1)
+        ])
+
+    def tearDown(self):
+        get_redis_connection('default').delete(category_feed_key('Nature'), category_build_key('Nature'))
+        bump_manifest_version()
+        PhotoCollection.objects.all().delete()
+        PhotoHashTag.objects.all().delete()
+        HashTag.objects.all().delete()
+        Collection.objects.all().delete()
+        Photo.objects.all().delete()
+        BackGroundColor.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_manifestview_category(self):
+        client = Client()
+        response = client.get('/photo/manifest?category=Nature')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            "fields" : ["id", "background_color", "width", "height"],
+            "data"   : [[2, 1], [None, 0xC0C5CC], [667, 1000], [1000, 667]]
+        })
+
+    def test_manifestview_collection(self):
+        client = Client()
+        response = client.get('/photo/manifest?collection=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'][0], [2, 1])
+
+    def test_manifestview_collection_changed(self):
+        client = Client()
+        client.get('/photo/manifest?collection=1')
+        PhotoCollection.objects.filter(photo_id=2).delete()
+
+        response = client.get('/photo/manifest?collection=1')
+        self.assertEqual(response.json()['data'][0], [1])
+
+    @patch('photo.tasks.requests.get')
+    def test_manifestview_color_set(self, get):
+        client = Client()
+        client.get('/photo/manifest?collection=1')
+        get.return_value.json.return_value = {'result' : {'colors' : {'background_colors' : [{'html_code' : '#112233'}]}}}
+        get_image_color('image2', 'key', 'secret')
+
+        response = client.get('/photo/manifest?collection=1')
+        self.assertEqual(response.json()['data'][1], [0x112233, 0xC0C5CC])
+
+    def test_manifestview_search(self):
+        HashTag.objects.create(id=1, name='forest')
+        PhotoHashTag.objects.create(photo_id=1, hashtag_id=1)
+        posting_index.seq = None
+        client   = Client()
+        response = client.get('/photo/manifest?search=forest')
+        self.assertEqual(response.json()['data'][0], [1])
+
+        posting_index.apply([json.dumps(['add', 2, 1, 'forest'])])
+        response = client.get('/photo/manifest?search=forest')
+        self.assertEqual(response.json()['data'][0], [2, 1])
+
+    def test_manifestview_private_collection(self):
+        client = Client()
+        response = client.get('/photo/manifest?collection=2')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"message" : "NON_EXISTING_COLLECTION"})
+
+class ModalCollectionViewTest(TestCase):
+    def setUp(self):
+        User.objects.create(id=1, first_name='first', last_name='last', user_name='test', email='test@test.com')
+        Photo.objects.bulk_create([
+            Photo(id=1, user_id=1, image='image1'),
+            Photo(id=2, user_id=1, image='image2')
+        ])
+        Collection.objects.bulk_create([
+            Collection(id=1, user_id=1, name='first'),
+            Collection(id=2, user_id=1, name='second', private=True)
+        ])
+        PhotoCollection.objects.create(photo_id=2, collection_id=1)
+        PhotoCollection.objects.create(photo_id=1, collection_id=1)
+        self.header = {'HTTP_Authorization' : jwt.encode({'user_id':1}, SECRET_KEY, algorithm=ALGORITHM).decode('utf-8')}
+
+    def tearDown(self):
+        PhotoCollection.objects.all().delete()
+        Collection.objects.all().delete()
+        Photo.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_modalcollectionview_success(self):
+        client = Client()
+        with self.assertNumQueries(2):
+            response = client.get('/photo/2', **self.header)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'data' : [{
+                'collection_name' : 'first',
+                'first_image'     : 'image1',
+                'photo_count'     : 2,
+                'private_status'  : False,
+                'photo_exist'     : True,
+                'version'         : 2
+            }, {
+                'collection_name' : 'second',
+                'first_image'     : False,
+                'photo_count'     : 0,
+                'private_status'  : True,
+                'photo_exist'     : False,
+                'version'         : 0
+            }]})
+
+    def test_collection_summary_on_remove(self):
+        PhotoCollection.objects.filter(photo_id=1, collection_id=1).delete()
+        collection = Collection.objects.get(id=1)
+        self.assertEqual(collection.photo_count, 1)
+        self.assertEqual(collection.cover_photo_id, 2)
+
+class AddCollectionViewTest(TestCase):
+    def setUp(self):
+        User.objects.create(id=1, first_name='first', last_name='last', user_name='test', email='test@test.com')
+        Photo.objects.bulk_create([
+            Photo(id=1, user_id=1, image='image1'),
+            Photo(id=2, user_id=1, image='image2')
+        ])
+        Collection.objects.bulk_create([
+            Collection(id=1, user_id=1, name='first'),
+            Collection(id=2, user_id=1, name='second')
+        ])
+        PhotoCollection.objects.create(photo_id=1, collection_id=1)
+        self.header = {'HTTP_Authorization' : jwt.encode({'user_id':1}, SECRET_KEY, algorithm=ALGORITHM).decode('utf-8')}
+
+    def tearDown(self):
+        PhotoCollection.objects.all().delete()
+        Collection.objects.all().delete()
+        Photo.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_addcollectionview_delta_add(self):
+        client = Client()
+        body   = {'photo_id' : 2, 'collection_name' : 'first', 'delta' : True}
+        response = client.post('/photo/add', json.dumps(body), content_type='application/json', **self.header)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'data' : {
+                'collection_name' : 'first',
+                'first_image'     : 'image1',
+                'photo_count'     : 2,
+                'private_status'  : False,
+                'photo_exist'     : True,
+                'version'         : 2
+            }})
+
+    def test_addcollectionview_delta_remove(self):
+        client = Client()
+        body   = {'photo_id' : 1, 'collection_name' : 'first', 'delta' : True}
+        response = client.post('/photo/add', json.dumps(body), content_type='application/json', **self.header)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['photo_exist'], False)
+        self.assertEqual(response.json()['data']['photo_count'], 0)
+        self.assertEqual(response.json()['data']['first_image'], False)
+
+    def test_addcollectionview_fail(self):
+        client = Client()
+        body   = {'photo_id' : 1, 'collection_name' : 'third'}
+        response = client.post('/photo/add', json.dumps(body), content_type='application/json', **self.header)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'message' : 'NON_EXISTING_COLLECTION'})
+
+class CollectionMainViewTest(TestCase):
+    def setUp(self):
+        User.objects.bulk_create([
+            User(id=1, first_name='we', last_name='plash', user_name='weplash', email='weplash@weplash.com'),
+            User(id=2, first_name='first', last_name='last', user_name='test2', email='test2@test.com', profile_image='profile2'),
+            User(id=3, first_name='first', last_name='last', user_name='test3', email='test3@test.com', profile_image='profile3')
+        ])
+        Photo.objects.bulk_create([
+            Photo(id=1, user_id=2, image='image1'),
+            Photo(id=2, user_id=3, image='image2'),
+            Photo(id=3, user_id=3, image='image3')
+        ])
+        Collection.objects.bulk_create([
+            Collection(id=1, user_id=1, name='Nature', description='nature'),
+            Collection(id=2, user_id=1, name='Animal', description='animal')
+        ])
+        get_redis_connection('default').delete(leaderboard_key(1), leaderboard_key(2))
+        PhotoCollection.objects.create(photo_id=1, collection_id=1)
+        PhotoCollection.objects.create(photo_id=2, collection_id=1)
+        PhotoCollection.objects.create(photo_id=3, collection_id=1)
+        PhotoCollection.objects.create(photo_id=1, collection_id=2)
+
+    def tearDown(self):
+        PhotoCollection.objects.all().delete()
+        get_redis_connection('default').delete(leaderboard_key(1), leaderboard_key(2))
+        Collection.objects.all().delete()
+        Photo.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_collectionmainview_success(self):
+        client = Client()
+        response = client.get('/photo/main-collection?category=Nature')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            "data" : [{
+                "collection"      : "Nature",
+                "description"     : "nature",
+                "contributions"   : 3,
+                "topcontributors" : [
+                    {"id" : 3, "profile_image" : "profile3"},
+                    {"id" : 2, "profile_image" : "profile2"}
+                ]
+            }]})
+
+    def test_collectionmainview_incremental(self):
+        client = Client()
+        client.get('/photo/main-collection?category=Animal')
+        PhotoCollection.objects.create(photo_id=2, collection_id=2)
+        PhotoCollection.objects.create(photo_id=3, collection_id=2)
+        PhotoCollection.objects.filter(photo_id=1, collection_id=2).delete()
+        response = client.get('/photo/main-collection?category=Animal')
+        self.assertEqual(response.json()['data'][0]['contributions'], 2)
+        self.assertEqual(response.json()['data'][0]['topcontributors'], [{"id" : 3, "profile_image" : "profile3"}])
+
+    def test_collectionmainview_fail(self):
+        client = Client()
+        response = client.get('/photo/main-collection?category=Nothing')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"message" : "NON_EXISTING_COLLECTION"})
+
+class RelatedCollectionCardTest(TestCase):
+    def setUp(self):
+        User.objects.create(id=1, first_name='first', last_name='last', user_name='test', email='test@test.com')
+        Photo.objects.bulk_create([Photo(id=photo_id, user_id=1, image=f'image{photo_id}') for photo_id in range(1, 6)])
+        HashTag.objects.bulk_create([HashTag(id=tag_id, name=f'tag{tag_id}') for tag_id in range(1, 5)])
+        PhotoHashTag.objects.bulk_create([PhotoHashTag(photo_id=1, hashtag_id=tag_id) for tag_id in range(1, 5)])
+        Collection.objects.bulk_create([Collection(id=collection_id, user_id=1, name=f'collection{collection_id}') for collection_id in range(1, 4)])
+        for collection_id in range(1, 4):
+            for photo_id in range(collection_id, 6):
+                PhotoCollection.objects.create(photo_id=photo_id, collection_id=collection_id)
+
+    def tearDown(self):
+        PhotoCollection.objects.all().delete()
+        PhotoHashTag.objects.all().delete()
+        Collection.objects.all().delete()
+        HashTag.objects.all().delete()
+        Photo.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_relatedcollection_query_budget(self):
+        client = Client()
+        with self.assertNumQueries(4):
+            response = client.get('/photo/related-collection?user=test')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'][0], {
+            "id"              : 1,
+            "image"           : ["image1", "image2", "image3"],
+            "srcset"          : [{}, {}, {}],
+            "name"            : "collection1",
+            "photos_number"   : 5,
+            "user_first_name" : "first",
+            "user_last_name"  : "last",
+            "tags"            : ["tag1", "tag2", "tag3"]
+        })
+        self.assertEqual(response.json()['data'][2]['image'], ["image3", "image4", "image5"])
+        self.assertEqual(response.json()['data'][2]['tags'], [])
+
+class BulkCollectionViewTest(TestCase):
+    def setUp(self):
+        User.objects.create(id=1, first_name='we', last_name='plash', user_name='weplash', email='weplash@weplash.com')
+        Photo.objects.bulk_create([Photo(id=photo_id, user_id=1, image=f'image{photo_id}') for photo_id in range(1, 5)])
+        Collection.objects.create(id=1, user_id=1, name='Nature')
+        PhotoCollection.objects.create(photo_id=1, collection_id=1)
+        PhotoCollection.objects.create(photo_id=2, collection_id=1)
+        self.header = {'HTTP_Authorization' : jwt.encode({'user_id':1}, SECRET_KEY, algorithm=ALGORITHM).decode('utf-8')}
+
+    def tearDown(self):
+        get_redis_connection('default').delete(category_feed_key('Nature'), category_build_key('Nature'))
+        PhotoCollection.objects.all().delete()
+        Collection.objects.all().delete()
+        Photo.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_bulkcollectionview_success(self):
+        client = Client()
+        get_category_feed('Nature')
+        body     = {'collection_name' : 'Nature', 'add' : [2, 3, 4, 9], 'remove' : [1, 5]}
+        response = client.post('/photo/collection/bulk', json.dumps(body), content_type='application/json', **self.header)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'data' : [
+                {'id' : 2, 'result' : 'ALREADY_IN_COLLECTION'},
+                {'id' : 3, 'result' : 'ADDED'},
+                {'id' : 4, 'result' : 'ADDED'},
+                {'id' : 9, 'result' : 'NON_EXISTING_PHOTO'},
+                {'id' : 1, 'result' : 'REMOVED'},
+                {'id' : 5, 'result' : 'NOT_IN_COLLECTION'}
+            ]})
+
+        collection = Collection.objects.get(id=1)
+        self.assertEqual(collection.photo_count, 3)
+        self.assertEqual(collection.cover_photo_id, 2)
+        self.assertEqual(list(get_category_feed('Nature')), [2, 3, 4])
+
+    def test_bulkcollectionview_remove_only(self):
+        client = Client()
+        body     = {'collection_name' : 'Nature', 'remove' : [1]}
+        response = client.post('/photo/collection/bulk', json.dumps(body), content_type='application/json', **self.header)
+        self.assertEqual(response.json(), {'data' : [{'id' : 1, 'result' : 'REMOVED'}]})
+
+        collection = Collection.objects.get(id=1)
+        self.assertEqual(collection.photo_count, 1)
+        self.assertEqual(collection.cover_photo_id, 2)
+
+    def test_bulkcollectionview_remove_query_count(self):
+        Photo.objects.bulk_create([Photo(id=photo_id, user_id=1, image=f'image{photo_id}') for photo_id in range(5, 55)])
+        PhotoCollection.objects.bulk_create([PhotoCollection(photo_id=photo_id, collection_id=1) for photo_id in range(5, 55)])
+        client = Client()
+        body   = {'collection_name' : 'Nature', 'remove' : list(range(5, 55))}
+        with self.assertNumQueries(7):
+            response = client.post('/photo/collection/bulk', json.dumps(body), content_type='application/json', **self.header)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Collection.objects.get(id=1).photo_count, 2)
+
+    def test_bulkcollectionview_overlap(self):
+        client = Client()
+        body     = {'collection_name' : 'Nature', 'add' : [3, 4], 'remove' : [4]}
+        response = client.post('/photo/collection/bulk', json.dumps(body), content_type='application/json', **self.header)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'OVERLAPPING_PHOTOS'})
+        self.assertFalse(PhotoCollection.objects.filter(photo_id=3).exists())
+
+    def test_bulkcollectionview_fail(self):
+        client = Client()
+        body     = {'collection_name' : 'Animal', 'add' : [1]}
+        response = client.post('/photo/collection/bulk', json.dumps(body), content_type='application/json', **self.header)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'message' : 'NON_EXISTING_COLLECTION'})
+
+class SearchTagViewTest(TestCase):
+    def setUp(self):
+        User.objects.create(id=1, first_name='first', last_name='last', user_name='testuser', email='test@test.com')
+        for photo_id in range(1, 5):
+            Photo.objects.create(id=photo_id, user_id=1, image=f'image{photo_id}')
+        for tag_id, name in enumerate(['dog', 'animal', 'pet', 'car'], 1):
+            HashTag.objects.create(id=tag_id, name=name)
+        for photo_id, tag_ids in {1 : [1, 2, 3], 2 : [1, 2], 3 : [1, 2, 3], 4 : [1, 4]}.items():
+            for tag_id in tag_ids:
+                PhotoHashTag.objects.create(photo_id=photo_id, hashtag_id=tag_id)
+        rebuild_cooccurrence()
+
+    def tearDown(self):
+        TagCooccurrence.objects.all().delete()
+        PhotoHashTag.objects.all().delete()
+        HashTag.objects.all().delete()
+        Photo.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_searchtagview_ranked_by_count(self):
+        client   = Client()
+        response = client.get('/photo/tag?search=dog')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"data" : [["animal"], ["pet"], ["car"]]})
+
+    def test_searchtagview_ranked_by_pmi(self):
+        client   = Client()
+        response = client.get('/photo/tag?search=animal&rank=pmi')
+        self.assertEqual(response.json(), {"data" : [["pet"], ["dog"]]})
+
+    def test_add_photo_tags_matches_rebuild(self):
+        PhotoHashTag.objects.create(photo_id=4, hashtag_id=3)
+        PhotoHashTag.objects.create(photo_id=4, hashtag_id=2)
+        add_photo_tags(4, [3, 2])
+        incremental = set(TagCooccurrence.objects.values_list('hashtag_id', 'related_id', 'count'))
+
+        rebuild_cooccurrence()
+        self.assertEqual(incremental, set(TagCooccurrence.objects.values_list('hashtag_id', 'related_id', 'count')))
+        self.assertEqual(TagCooccurrence.objects.get(hashtag_id=1, related_id=3).count, 3)
+
+class PhotoSearchTest(TestCase):
+    def setUp(self):
+        User.objects.create(id=1, first_name='first', last_name='last', user_name='testuser', email='test@test.com')
+        for photo_id in range(1, 6):
+            Photo.objects.create(id=photo_id, user_id=1, image=f'image{photo_id}')
+        for tag_id, name in enumerate(['dog', 'animal', 'pet', 'car'], 1):
+            HashTag.objects.create(id=tag_id, name=name)
+        for photo_id, tag_ids in {1 : [1, 2, 3], 2 : [1, 2], 3 : [1, 2, 3], 4 : [1, 4], 5 : [4]}.items():
+            for tag_id in tag_ids:
+                PhotoHashTag.objects.create(photo_id=photo_id, hashtag_id=tag_id)
+        posting_index.seq = None
+
+    def tearDown(self):
+        PhotoHashTag.objects.all().delete()
+        HashTag.objects.all().delete()
+        Photo.objects.all().delete()
+        User.objects.all().delete()
+
+    def search(self, query):
+        response = self.client.get(f'/photo?{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_photo_search_and(self):
+        data = self.search('search=dog,Animal')['data']
+        self.assertEqual([photo['id'] for photo in data], [3, 2, 1])
+
+    def test_photo_search_or_not(self):
+        data = self.search('any=pet,car&exclude=dog')['data']
+        self.assertEqual([photo['id'] for photo in data], [5])
+
+        data = self.search('search=dog&any=pet,car')['data']
+        self.assertEqual([photo['id'] for photo in data], [4, 3, 1])
+
+    def test_photo_search_cursor(self):
+        result = self.search('search=dog&limit=2&after=')
+        self.assertEqual([photo['id'] for photo in result['data']], [4, 3])
+
+        result = self.search(f'search=dog&limit=2&after={result["next_cursor"]}')
+        self.assertEqual([photo['id'] for photo in result['data']], [2, 1])
+        self.assertIsNone(result['next_cursor'])
+
+    def test_photo_search_fuzzy(self):
+        tag_index.snapshot = None
+        data = self.search('search=animla&exclude=pett')['data']
+        self.assertEqual(data, [])
+
+        data = self.search('search=animla&exclude=pett&fuzzy=1')['data']
+        self.assertEqual([photo['id'] for photo in data], [2])
+
+    def test_photo_search_facets(self):
+        red  = BackGroundColor.objects.create(id=1, name='#FF0000')
+        blue = BackGroundColor.objects.create(id=2, name='#0000FF')
+        Photo.objects.filter(id=1).update(width=300, height=200, background_color=red)
+        Photo.objects.filter(id=2).update(width=200, height=300, background_color=blue)
+        Photo.objects.filter(id=3).update(width=100, height=100, background_color=red)
+        rebuild_cooccurrence()
+
+        facets = self.search('search=dog')['facets']
+        self.assertEqual(facets, {
+            "tags"        : [
+                {"name" : "animal", "count" : 3},
+                {"name" : "pet", "count" : 2},
+                {"name" : "car", "count" : 1}
+            ],
+            "colors"      : {"red" : 2, "blue" : 1},
+            "orientation" : {"landscape" : 1, "portrait" : 1, "square" : 1}
+        })
+
+        posting_index.apply([json.dumps(['photo', 3, 0, json.dumps({"color" : "blue", "orientation" : "portrait"})])])
+        facets = self.search('search=pet')['facets']
+        self.assertEqual(facets['colors'], {"red" : 1, "blue" : 1})
+        self.assertEqual(facets['orientation'], {"landscape" : 1, "portrait" : 1, "square" : 0})
+
+    def test_posting_index_apply(self):
+        self.search('search=dog')
+        posting_index.apply([
+            json.dumps(['add', 5, 1, 'dog']),
+            json.dumps(['remove', 1, 1, '']),
+            json.dumps(['drop_photo', 2, 0, ''])
+        ])
+        self.assertEqual(posting_index.search(['dog']).tolist(), [3, 4, 5])
@@ -0,0 +1,81 @@
+from django.db                  import connection
+from django.db.models           import (
+    F,
+    Count,
+    Window
+)
+from django.db.models.functions import RowNumber
+
+from account.models import Follow
+
+from .models     import (
+    Photo,
+    Timeline
+)
+from .pagination import paginate
+
+TIMELINE_LIMIT = 1000
+
+def trim_timelines(user_ids):
+    full_ids = list(Timeline.objects.filter(user_id__in=user_ids).values('user_id').annotate(
+        count = Count('id')
+    ).filter(count__gt=TIMELINE_LIMIT).values_list('user_id', flat=True))
+    if not full_ids:
+        return
+
+    ranked = Timeline.objects.filter(user_id__in=full_ids).annotate(position=Window(
+        expression   = RowNumber(),
+        partition_by = [F('user_id')],
+        order_by     = F('photo_id').desc()
+    )).values_list('id', 'position')
+
+    sql, params = ranked.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT ranked.id FROM ({sql}) ranked WHERE ranked.position > %s', [*params, TIMELINE_LIMIT])
+        stale_ids = [row[0] for row in cursor.fetchall()]
+    if stale_ids:
+        Timeline.objects.filter(id__in=stale_ids).delete()
+
+def push_photo(photo_id, author_id):
+    followers    = Follow.objects.filter(to_user_id=author_id, status=True).values_list('from_user_id', flat=True)
+    follower_ids = list(followers)
+
+    Timeline.objects.bulk_create([
+        Timeline(user_id=follower_id, photo_id=photo_id) for follower_id in follower_ids
+    ], ignore_conflicts=True)
+    if follower_ids:
+        trim_timelines(followers)
+
+def follow(user_id, followee_id):
+    photo_ids = Photo.objects.filter(user_id=followee_id).order_by('-id').values_list(
+        'id', flat=True
+    )[:TIMELINE_LIMIT]
+
+    Timeline.objects.bulk_create([
+        Timeline(user_id=user_id, photo_id=photo_id) for photo_id in photo_ids
+    ], ignore_conflicts=True)
+    trim_timelines([user_id])
+
+def unfollow(user_id, followee_id):
+    Timeline.objects.filter(user_id=user_id, photo__user_id=followee_id).delete()
+
+def rebuild_timeline(user_id):
+    photo_ids = Photo.objects.filter(
+        user__follower__from_user_id = user_id,
+        user__follower__status       = True
+    ).order_by('-id').values_list('id', flat=True).distinct()[:TIMELINE_LIMIT]
+
+    Timeline.objects.filter(user_id=user_id).delete()
+    Timeline.objects.bulk_create([
+        Timeline(user_id=user_id, photo_id=photo_id) for photo_id in photo_ids
+    ])
+
+def get_timeline_page(user_id, offset, limit, after=None):
+    entries, next_cursor = paginate(
+        Timeline.objects.filter(user_id=user_id).order_by('-photo_id'),
+        offset,
+        limit,
+        after,
+        key = 'photo_id'
+    )
+    return [entry.photo_id for entry in entries], next_cursor
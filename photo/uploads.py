@@ -0,0 +1,242 @@
+import io
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from django.core.cache import cache
+from django.db         import transaction
+
+from account.models import Collection
+from my_settings    import AWS_S3
+
+from .models             import (
+    Photo,
+    HashTag,
+    PhotoHashTag,
+    PhotoCollection
+)
+from .tasks              import (
+    upload_image,
+    upload_images,
+    fan_out_photo,
+    fan_out_photos
+)
+from .category_feed      import update_category_feed
+from .cooccurrence       import (
+    add_photo_tags,
+    add_single_tag_photos
+)
+from .collection_summary import refresh_summary
+from .leaderboard        import refresh_leaderboard
+from .search_index       import photo_facets
+from .change_log         import log_change
+from .suggest            import bump_hashtag_version
+from .images             import read_image_meta
+from .storage            import (
+    BUCKET,
+    BATCH_WORKERS,
+    batch_transfer_config,
+    get_s3_client,
+    upload_file
+)
+
+UPLOAD_TIMEOUT  = 60 * 60
+PRESIGN_EXPIRES = 60 * 10
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+HEADER_BYTES    = 64 * 1024
+CONTENT_TYPES   = ('image/jpeg', 'image/png', 'image/webp', 'image/gif')
+
+def pending_upload_key(upload_id):
+    return f'pending_upload_{upload_id}'
+
+def new_object_key():
+    return str(uuid.uuid4().int)
+
+def save_photo(user_id, key, location, category, width, height):
+    with transaction.atomic():
+        photo = Photo.objects.create(
+            user_id  = user_id,
+            image    = AWS_S3['url']+key,
+            location = location,
+            width    = width,
+            height   = height
+        )
+        if HashTag.objects.filter(name=location).exists():
+            hashtag = HashTag.objects.get(name=location)
+        else:
+            hashtag = HashTag.objects.create(name=location)
+        PhotoHashTag.objects.create(
+            photo   = photo,
+            hashtag = hashtag
+        )
+        add_photo_tags(photo.id, [hashtag.id])
+        PhotoCollection.objects.create(
+            photo      = photo,
+            collection = Collection.objects.get(user__user_name='weplash', name=category)
+        )
+    update_category_feed(category, added_ids=[photo.id])
+    upload_image.delay(photo.image)
+    fan_out_photo.delay(photo.id, user_id)
+    return photo
+
+def save_photos(user_id, uploads):
+    locations = {upload['location'] for upload in uploads}
+    with transaction.atomic():
+        Photo.objects.bulk_create([
+            Photo(
+                user_id  = user_id,
+                image    = AWS_S3['url']+upload['key'],
+                location = upload['location'],
+                width    = upload['width'],
+                height   = upload['height']
+            ) for upload in uploads
+        ])
+        photos = {photo.image : photo for photo in Photo.objects.filter(
+            image__in = [AWS_S3['url']+upload['key'] for upload in uploads]
+        )}
+
+        hashtags = dict(HashTag.objects.filter(name__in=locations).values_list('name', 'id'))
+        missing  = locations - hashtags.keys()
+        if missing:
+            HashTag.objects.bulk_create([HashTag(name=name) for name in missing])
+            hashtags.update(HashTag.objects.filter(name__in=missing).values_list('name', 'id'))
+
+        PhotoHashTag.objects.bulk_create([
+            PhotoHashTag(photo=photos[AWS_S3['url']+upload['key']], hashtag_id=hashtags[upload['location']])
+            for upload in uploads
+        ])
+        PhotoCollection.objects.bulk_create([
+            PhotoCollection(photo=photos[AWS_S3['url']+upload['key']], collection_id=upload['collection'].id)
+            for upload in uploads
+        ])
+        add_single_tag_photos([hashtags[upload['location']] for upload in uploads])
+
+        collections = {upload['collection'].id : upload['collection'] for upload in uploads}
+        for collection_id in collections:
+            refresh_summary(collection_id)
+
+        for upload in uploads:
+            photo = photos[AWS_S3['url']+upload['key']]
+            log_change('photo', photo.id, name=json.dumps(photo_facets(photo)))
+            log_change('add', photo.id, hashtags[upload['location']], upload['location'])
+
+    if missing:
+        bump_hashtag_version()
+    for collection in collections.values():
+        refresh_leaderboard(collection.id)
+        update_category_feed(collection.name, added_ids=[
+            photos[AWS_S3['url']+upload['key']].id for upload in uploads if upload['collection'].id == collection.id
+        ])
+    upload_images.delay([photo.image for photo in photos.values()])
+    fan_out_photos.delay(sorted(photo.id for photo in photos.values()), user_id)
+    return {upload['key'] : photos[AWS_S3['url']+upload['key']] for upload in uploads}
+
+def upload_batch(user_id, files, metadata):
+    collections = {collection.name : collection for collection in Collection.objects.filter(
+        user__user_name = 'weplash',
+        name__in        = {item['category'] for item in metadata}
+    )}
+
+    results = [{"name" : image_file.name, "result" : None} for image_file in files]
+    uploads = []
+    for index, (image_file, item) in enumerate(zip(files, metadata)):
+        meta = read_image_meta(image_file)
+        if meta is None:
+            results[index]['result'] = 'INVALID_IMAGE'
+        elif item['category'] not in collections:
+            results[index]['result'] = 'INVALID_CATEGORY'
+        else:
+            uploads.append({
+                "index"        : index,
+                "file"         : image_file,
+                "key"          : new_object_key(),
+                "location"     : item['location'],
+                "collection"   : collections[item['category']],
+                "width"        : meta['width'],
+                "height"       : meta['height'],
+                "content_type" : meta['content_type']
+            })
+
+    stored = []
+    if uploads:
+        with ThreadPoolExecutor(max_workers=min(BATCH_WORKERS, len(uploads))) as executor:
+            futures = [
+                (executor.submit(upload_file, upload['file'], upload['key'], upload['content_type'], batch_transfer_config), upload)
+                for upload in uploads
+            ]
+        for future, upload in futures:
+            if future.exception() is None:
+                stored.append(upload)
+            else:
+                results[upload['index']]['result'] = 'UPLOAD_FAILED'
+
+    if stored:
+        photos = save_photos(user_id, stored)
+        for upload in stored:
+            results[upload['index']].update({
+                "result" : 'UPLOADED',
+                "id"     : photos[upload['key']].id,
+                "image"  : photos[upload['key']].image
+            })
+    return results
+
+def start_upload(user_id, location, category, content_type):
+    key       = new_object_key()
+    presigned = get_s3_client().generate_presigned_post(
+        BUCKET,
+        key,
+        Fields     = {"Content-Type" : content_type},
+        Conditions = [
+            {"Content-Type" : content_type},
+            ["content-length-range", 1, MAX_UPLOAD_SIZE]
+        ],
+        ExpiresIn  = PRESIGN_EXPIRES
+    )
+    upload_id = uuid.uuid4().hex
+    cache.set(pending_upload_key(upload_id), {
+        "user_id"  : user_id,
+        "key"      : key,
+        "location" : location,
+        "category" : category
+    }, UPLOAD_TIMEOUT)
+    return {
+        "upload_id" : upload_id,
+        "url"       : presigned['url'],
+        "fields"    : presigned['fields']
+    }
+
+def read_upload_meta(s3_client, key):
+    size = HEADER_BYTES
+    while True:
+        header = s3_client.get_object(
+            Bucket = BUCKET,
+            Key    = key,
+            Range  = f'bytes=0-{size - 1}'
+        )['Body'].read()
+        meta = read_image_meta(io.BytesIO(header))
+        if meta is not None or len(header) < size:
+            return meta
+        size *= 2
+
+def finish_upload(user_id, upload_id):
+    pending = cache.get(pending_upload_key(upload_id))
+    if not pending or pending['user_id'] != user_id:
+        return None, 'INVALID_UPLOAD'
+
+    s3_client = get_s3_client()
+    try:
+        meta = read_upload_meta(s3_client, pending['key'])
+    except ClientError:
+        return None, 'UPLOAD_NOT_FOUND'
+
+    if not cache.delete(pending_upload_key(upload_id)):
+        return None, 'INVALID_UPLOAD'
+
+    if meta is None:
+        s3_client.delete_object(Bucket=BUCKET, Key=pending['key'])
+        return None, 'INVALID_IMAGE'
+
+    photo = save_photo(user_id, pending['key'], pending['location'], pending['category'], meta['width'], meta['height'])
+    return photo, None
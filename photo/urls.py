@@ -2,10 +2,14 @@ from django.urls import path
 
 from .views import (
     UploadView,
+    BatchUploadView,
+    UploadInitView,
+    UploadCompleteView,
     RelatedPhotoView,
     RelatedCollectionView,
     PhotoView,
     SearchBarView,
+    SuggestTagView,
     UserCardView,
     LikePhotoView,
     BackgroundView,
@@ -15,7 +19,13 @@ from .views import (
     ModalCollectionView,
     AddCollectionView,
     CreateCollectionView,
-    SearchTagView
+    SearchTagView,
+    ViewerStateView,
+    PhotoStatsView,
+    DownloadView,
+    SimilarColorView,
+    ManifestView,
+    BulkCollectionView
 )
 
 urlpatterns= [
@@ -26,12 +36,22 @@ urlpatterns= [
     path('/back',BackgroundView.as_view()),
     path('/main-collection', CollectionMainView.as_view()),
     path('/upload', UploadView.as_view()),
+    path('/upload/batch', BatchUploadView.as_view()),
+    path('/upload/init', UploadInitView.as_view()),
+    path('/upload/complete', UploadCompleteView.as_view()),
     path('/search', SearchBarView.as_view()),
+    path('/search/suggest', SuggestTagView.as_view()),
     path('/like', LikePhotoView.as_view()),
     path('/back/related-photo/<photo_id>', RelatedPhotoBackColorView.as_view()),
     path('/add', AddCollectionView.as_view()),
     path('/create', CreateCollectionView.as_view()),
     path('/<int:photo_id>', ModalCollectionView.as_view()),
     path('/heart', LikePhotoView.as_view()),
-    path('/tag',SearchTagView.as_view())
+    path('/tag',SearchTagView.as_view()),
+    path('/viewer-state', ViewerStateView.as_view()),
+    path('/<int:photo_id>/stats', PhotoStatsView.as_view()),
+    path('/<int:photo_id>/download', DownloadView.as_view()),
+    path('/color', SimilarColorView.as_view()),
+    path('/manifest', ManifestView.as_view()),
+    path('/collection/bulk', BulkCollectionView.as_view())
 ]
@@ -0,0 +1,28 @@
+from account.models import Like
+
+from .models import PhotoCollection
+
+def get_viewer_state(user_id, photo_ids, memo=None):
+    memo = {} if memo is None else memo
+    ids  = [photo_id for photo_id in set(photo_ids) if photo_id not in memo]
+
+    if user_id and ids:
+        likes = set(Like.objects.filter(
+            user_id      = user_id,
+            status       = True,
+            photo_id__in = ids
+        ).values_list('photo_id', flat=True))
+
+        collections = set(PhotoCollection.objects.filter(
+            collection__user_id = user_id,
+            photo_id__in        = ids
+        ).values_list('photo_id', flat=True))
+    else:
+        likes, collections = set(), set()
+
+    for photo_id in ids:
+        memo[photo_id] = {
+            "user_like"       : photo_id in likes,
+            "user_collection" : photo_id in collections
+        }
+    return {photo_id : memo[photo_id] for photo_id in photo_ids}
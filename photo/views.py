@@ -1,18 +1,12 @@
-import uuid
 import json
-import boto3
-from PIL            import Image
-from urllib.request import urlopen
 
 from django.core.cache import cache
-from django.db         import transaction
-from django.views      import View
-from django.db.models  import (
-    Prefetch,
-    Q,
-    F,
-    Count
+from django.db         import (
+    connection,
+    transaction
 )
+from django.views      import View
+from django.db.models  import Q
 
 from django.http import (
     JsonResponse,
@@ -24,56 +18,95 @@ from .models import (
     HashTag,
     Photo,
     PhotoCollection,
-    BackGroundColor,
-    PhotoHashTag
+    BackGroundColor
 )
 
 from account.models import (
     User,
     Collection,
-    Like,
-    Follow
+    Like
+)
+
+from photo.timeline           import get_timeline_page
+from photo.category_feed      import (
+    CATEGORY_OWNER,
+    get_category_page,
+    update_category_feed
+)
+from photo.pagination         import paginate
+from photo.images             import read_image_meta
+from photo.storage            import upload_file
+from photo.uploads            import (
+    CONTENT_TYPES,
+    new_object_key,
+    upload_batch,
+    save_photo,
+    start_upload,
+    finish_upload
+)
+from photo.search_index       import search_photos
+from photo.viewer_state       import get_viewer_state
+from photo.related            import get_related_photos
+from photo.colors             import (
+    similar_to_color,
+    similar_to_photo
+)
+from photo.cooccurrence       import get_related_tags
+from photo.suggest            import (
+    tag_index,
+    get_hashtag_version,
+    SUGGEST_LIMIT
+)
+from photo.collection_summary import (
+    get_collection_list,
+    build_collection_summary,
+    refresh_summary
+)
+from photo.leaderboard        import (
+    get_top_contributors,
+    refresh_leaderboard
+)
+from photo.collection_cards   import build_collection_cards
+from photo.manifest           import (
+    get_category_manifest,
+    get_collection_manifest,
+    get_search_manifest
+)
+from photo.counters           import (
+    view_counter,
+    download_counter,
+    downloader_counter
+)
+from photo.cards              import (
+    get_cards,
+    hydrate_photos
 )
 
-from photo.tasks import upload_image
-from my_settings import AWS_S3
+def get_client_ip(request):
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded_for:
+        return forwarded_for.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+def split_tags(value):
+    return [tag.strip() for tag in value.split(',') if tag.strip()]
 
 class RelatedPhotoView(View):
     PHOTO_LIMIT = 20
     @login_check
     def get(self, request, user_id, photo_id):
         try:
-            photo       = Photo.objects.get(id=photo_id)
-            photo.views = F('views') +1
-            photo.save()
+            photo        = Photo.objects.only('id').get(id=photo_id)
+            view_counter.incr(photo.id)
             related_tags = list(HashTag.objects.filter(photo__id = photo_id).values_list('name', flat=True))
 
-            photos = Photo.objects.filter(
-                hashtag__name__in = related_tags
-            ).exclude(id=photo_id).prefetch_related("user").distinct()
-
-            likes = set(Like.objects.filter(
-                user_id   = user_id,
-                status    = True,
-                photo__in = list(photos)
-            ).values_list('photo_id', flat=True))
-
-            collections = set(PhotoCollection.objects.filter(
-                collection__user_id = user_id,
-                photo__in           = list(photos)
-            ).values_list('photo_id', flat=True))
+            photo_ids    = get_related_photos(photo.id)[:self.PHOTO_LIMIT]
+            viewer_state = get_viewer_state(user_id, photo_ids)
 
             result = [{
-                "id"                 : photo.id,
-                "image"              : photo.image,
-                "location"           : photo.location,
-                "user_first_name"    : photo.user.first_name,
-                "user_last_name"     : photo.user.last_name,
-                "user_name"          : photo.user.user_name,
-                "user_profile_image" : photo.user.profile_image,
-                "user_like"          : True if photo.id in likes else False,
-                "user_collection"    : True if photo.id in collections else False
-            } for photo in photos[:self.PHOTO_LIMIT]]
+                **card,
+                **viewer_state[card['id']]
+            } for card in get_cards(photo_ids)]
             return JsonResponse({"tags":related_tags, "data":result}, status=200)
         except Photo.DoesNotExist:
             return JsonResponse({'message':'NON_EXISTING_PHOTO'}, status=401)
@@ -101,29 +134,16 @@ class RelatedCollectionView(View):
 
             collections = Collection.objects.filter(query).exclude(
                 user__user_name = 'weplash'
-            ).prefetch_related(Prefetch("photo_set"), Prefetch("photo_set__hashtag"))
+            ).select_related("user")
 
             if photo_id:
                 collections = collections[:self.LIMIT_NUM]
 
-            result = [{
-                "id"              : collection.id,
-                "image"           : [photo.image for photo in collection.photo_set.all()[:self.LIMIT_NUM]],
-                "name"            : collection.name,
-                "photos_number"   : collection.photo_set.all().count(),
-                "user_first_name" : collection.user.first_name,
-                "user_last_name"  : collection.user.last_name,
-                "tags"            : [tag.name for tag in collection.photo_set.first().hashtag.all()[:self.LIMIT_NUM]]
-            } for collection in collections]
+            result = build_collection_cards(collections, self.LIMIT_NUM)
             return JsonResponse({'data':result}, status=200)
         except ValueError:
             return JsonResponse({"message":"INVALID_KEY"}, status=400)
 
-class SearchBarView(View):
-    def get(self, request):
-        result = list(HashTag.objects.all().order_by('name').values_list('name', flat=True))
-        return JsonResponse({"data" : result}, status=200)
-
 class UserCardView(View):
     PHOTO_LIMIT = 3
     @login_check
@@ -151,51 +171,78 @@ class UploadView(View):
     def post(self, request, user_id):
         try:
             if user_id:
-                s3_client = boto3.client(
-                    's3',
-                    aws_access_key_id     = AWS_S3['access_key'],
-                    aws_secret_access_key = AWS_S3['secret_access_key']
-                )
-                url_id = str(uuid.uuid4().int)
-                s3_client.upload_fileobj(
-                    request.FILES['filename'],
-                    'weplash',
-                    url_id,
-                    ExtraArgs = {"ContentType":request.FILES['filename'].content_type}
-                )
-                data  = request.POST.dict()
-                image = Image.open(urlopen(AWS_S3['url']+url_id))
-                with transaction.atomic():
-                    photo = Photo.objects.create(
-                        user_id  = user_id,
-                        image    = AWS_S3['url']+url_id,
-                        location = data['location'],
-                        width    = image.width,
-                        height   = image.height
-                    )
-                    if HashTag.objects.filter(name=data['location']).exists():
-                        hashtag = HashTag.objects.get(name=data['location'])
-                    else:
-                        hashtag = HashTag.objects.create(
-                            name = data['location']
-                        )
-                    PhotoHashTag.objects.create(
-                        photo   = photo,
-                        hashtag = hashtag
-                    )
-                    PhotoCollection.objects.create(
-                        photo = photo,
-                        collection = Collection.objects.get(
-                            user = User.objects.get(user_name='weplash'),
-                            name = data['category']
-                        )
-                    )
-                upload_image.delay(photo.image)
+                meta = read_image_meta(request.FILES['filename'])
+                if meta is None:
+                    return JsonResponse({'message':'INVALID_IMAGE'}, status=400)
+
+                url_id = new_object_key()
+                upload_file(request.FILES['filename'], url_id, meta['content_type'])
+                data = request.POST.dict()
+                save_photo(user_id, url_id, data['location'], data['category'], meta['width'], meta['height'])
                 return HttpResponse(status=200)
             return JsonResponse({'message':'UNAUTHORIZED'}, status=401)
         except KeyError:
             return JsonResponse({'message':"KEY_ERROR"}, status=400)
 
+class BatchUploadView(View):
+    FILE_LIMIT = 50
+
+    @login_check
+    def post(self, request, user_id):
+        try:
+            if not user_id:
+                return JsonResponse({'message':'UNAUTHORIZED'}, status=401)
+
+            files    = request.FILES.getlist('files')
+            metadata = json.loads(request.POST['metadata'])
+            if not files or len(files) > self.FILE_LIMIT:
+                return JsonResponse({'message':'INVALID_FILE_COUNT'}, status=400)
+            if len(metadata) != len(files):
+                return JsonResponse({'message':'INVALID_METADATA'}, status=400)
+
+            return JsonResponse({'data':upload_batch(user_id, files, metadata)}, status=200)
+        except KeyError:
+            return JsonResponse({'message':'KEY_ERROR'}, status=400)
+        except (TypeError, ValueError):
+            return JsonResponse({'message':'VALUE_ERROR'}, status=400)
+
+class UploadInitView(View):
+    @login_check
+    def post(self, request, user_id):
+        try:
+            if not user_id:
+                return JsonResponse({'message':'UNAUTHORIZED'}, status=401)
+
+            data         = json.loads(request.body)
+            content_type = data.get('content_type', 'image/jpeg')
+            if content_type not in CONTENT_TYPES:
+                return JsonResponse({'message':'INVALID_IMAGE'}, status=400)
+            if not Collection.objects.filter(user__user_name='weplash', name=data['category']).exists():
+                return JsonResponse({'message':'INVALID_CATEGORY'}, status=400)
+
+            upload = start_upload(user_id, data['location'], data['category'], content_type)
+            return JsonResponse({'data':upload}, status=200)
+        except ValueError:
+            return JsonResponse({'message':'VALUE_ERROR'}, status=400)
+        except KeyError:
+            return JsonResponse({'message':'KEY_ERROR'}, status=400)
+
+class UploadCompleteView(View):
+    @login_check
+    def post(self, request, user_id):
+        try:
+            if not user_id:
+                return JsonResponse({'message':'UNAUTHORIZED'}, status=401)
+
+            photo, error = finish_upload(user_id, json.loads(request.body)['upload_id'])
+            if error:
+                return JsonResponse({'message':error}, status=400)
+            return JsonResponse({'data':{'id':photo.id, 'image':photo.image}}, status=200)
+        except ValueError:
+            return JsonResponse({'message':'VALUE_ERROR'}, status=400)
+        except KeyError:
+            return JsonResponse({'message':'KEY_ERROR'}, status=400)
+
 class PhotoView(View):
     @login_check
     def get(self,request,user_id):
@@ -203,22 +250,28 @@ class PhotoView(View):
             query = Q()
             offset        = int(request.GET.get('offset', 0))
             limit         = int(request.GET.get('limit', 20))
+            after         = request.GET.get('after',None)
             category      = request.GET.get('category',None)
             user          = request.GET.get('user',None)
             user_category = request.GET.get('user_category',None)
-            hashtag       = request.GET.get('search',None)
+            all_tags      = split_tags(request.GET.get('search',''))
+            any_tags      = split_tags(request.GET.get('any',''))
+            not_tags      = split_tags(request.GET.get('exclude',''))
+            photo_ids     = None
+            facets        = None
             if category:
                 if category == 'Photo':
                     pass
                 elif category == 'Following':
-                    if Follow.objects.filter(from_user_id=user_id).exists():
-                        query &= (Q(user__follower__from_user_id    = user_id,
-                                    user__follower__status          = True))
-                    else:
-                        return JsonResponse({"data" : []}, status=200)
+                    photo_ids, next_cursor = get_timeline_page(user_id, offset, limit, after)
                 else:
-                    query &= (Q(collection__user__user_name ='weplash',
-                                collection__name            = category))
+                    photo_ids, next_cursor = get_category_page(category, offset, limit, after)
+            elif all_tags or any_tags:
+                if request.GET.get('fuzzy'):
+                    all_tags = [tag_index.correct(tag) for tag in all_tags]
+                    any_tags = [tag_index.correct(tag) for tag in any_tags]
+                    not_tags = [tag_index.correct(tag) for tag in not_tags]
+                photo_ids, next_cursor, facets = search_photos(all_tags, any_tags, not_tags, offset, limit, after)
             elif user:
                 if user_category == 'photos':
                     query &= (Q(user__user_name=user))
@@ -236,51 +289,40 @@ class PhotoView(View):
                     query &= (Q(collection__user__id    = user_id,
                                 collection__name        = user_category))
 
-            elif hashtag:
-                query &= (Q(hashtag__name  = hashtag))
-
-            photos = Photo.objects.filter(query).prefetch_related("user").order_by('-id')
-
-            likes = set(Like.objects.filter(
-                user_id = user_id,
-                status  = True, photo__in = list(photos)
-            ).values_list('photo_id', flat=True))
+            if photo_ids is None:
+                photos            = Photo.objects.filter(query).only('id').order_by('-id')
+                page, next_cursor = paginate(photos, offset, limit, after)
+                photo_ids         = [photo.id for photo in page]
 
-            collections = set(PhotoCollection.objects.filter(
-                collection__user_id = user_id,
-                photo__in           = list(photos)
-            ).values_list('photo_id', flat=True))
+            viewer_state = get_viewer_state(user_id, photo_ids)
 
             data = [{
-                "id"                 : photo.id,
-                "image"              : photo.image,
-                "location"           : photo.location,
-                "user_first_name"    : photo.user.first_name,
-                "user_last_name"     : photo.user.last_name,
-                "user_profile_image" : photo.user.profile_image,
-                "user_name"          : photo.user.user_name,
-                "width"              : photo.width,
-                "height"             : photo.height,
-                "user_like"          : True if photo.id in likes else False,
-                "user_collection"    : True if photo.id in collections else False
-            } for photo in photos[offset*limit:(offset+1)*limit]]
-            return JsonResponse({"data":data},status=200)
+                **card,
+                **viewer_state[card['id']]
+            } for card in get_cards(photo_ids)]
+            result = {"data":data}
+            if after is not None:
+                result["next_cursor"] = next_cursor
+            if facets is not None:
+                result["facets"] = facets
+            return JsonResponse(result,status=200)
         except ValueError:
             return JsonResponse({"message":"VALUE_ERROR"},status=400)
         except KeyError:
             return JsonResponse({"message":"KEY_ERROR"},status=400)
 
 class CollectionMainView(View):
+    CONTRIBUTOR_LIMIT = 5
+
     def get(self,request):
         try:
-            category = request.GET.get('category',None)
-            collection = Collection.objects.get(name=category, user=User.objects.get(user_name='weplash'))
-            user = User.objects.filter(photo__photocollection__collection = Collection.objects.get(user=User.objects.get(user_name='weplash'),name='Nature')).distinct().annotate(count=Count('photo__id'))
+            category   = request.GET.get('category',None)
+            collection = Collection.objects.get(name=category, user__user_name='weplash')
             result = [{
                     "collection"      : collection.name,
                     "description"     : collection.description,
-                    "contributions"   : collection.photocollection_set.all().aggregate(Count('id'))['id__count'],
-                    "topcontributors" : list(user.order_by('-count')[:5].values('id', 'profile_image'))
+                    "contributions"   : collection.photo_count,
+                    "topcontributors" : get_top_contributors(collection, self.CONTRIBUTOR_LIMIT)
             }]
             return JsonResponse({"data":result},status=200)
         except Collection.DoesNotExist:
@@ -300,8 +342,10 @@ class BackgroundView(View):
             user          = request.GET.get('user',None)
             user_category = request.GET.get('user_category',None)
             hashtag       = request.GET.get('search',None)
+            page          = None
             if category:
-                query &= (Q(collection__user__user_name='weplash', collection__name=category))
+                photo_ids, _ = get_category_page(category, offset, limit)
+                page         = hydrate_photos(photo_ids, "background_color")
             elif user:
                 if user_category == 'photos':
                     query &= (Q(user__user_name=user))
@@ -314,13 +358,15 @@ class BackgroundView(View):
                     name = hashtag
                 )),query.AND)
 
-            photos = Photo.objects.filter(query).prefetch_related("user","background_color")
+            if page is None:
+                photos = Photo.objects.filter(query).prefetch_related("user","background_color")
+                page   = photos[offset*limit:(offset+1)*limit]
             data = [{
                 "id"                : photo.id,
                 "background_color"  : photo.background_color.name,
                 "width"             : photo.width,
                 "height"            : photo.height
-            }for photo in photos[offset*limit:(offset+1)*limit]]
+            }for photo in page]
             return JsonResponse({"data":data},status=200)
         except ValueError:
             return JsonResponse({"message":"VALUE_ERROR"},status=400)
@@ -328,9 +374,38 @@ class BackgroundView(View):
             return JsonResponse({'message' : "KEY_ERROR"}, status=400)
 
 class SearchBarView(View):
+    TIMEOUT = 60 * 60 * 24
+
+    def get(self, request):
+        version = get_hashtag_version()
+        etag    = f'"{version}"'
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponse(status=304)
+
+        key     = f'hashtag_list_{version}'
+        content = cache.get(key)
+        if content is None:
+            result  = list(HashTag.objects.all().order_by('name').values_list('name', flat=True))
+            content = json.dumps({"data" : result})
+            cache.set(key, content, self.TIMEOUT)
+
+        response         = HttpResponse(content, content_type='application/json', status=200)
+        response['ETag'] = etag
+        return response
+
+class SuggestTagView(View):
+    DEFAULT_LIMIT = 10
+
     def get(self, request):
-        result = list(HashTag.objects.all().order_by('name').values_list('name', flat=True))
-        return JsonResponse({"data" : result}, status=200)
+        try:
+            prefix = request.GET.get('q', '').strip()
+            limit  = min(int(request.GET.get('k', self.DEFAULT_LIMIT)), SUGGEST_LIMIT)
+            if limit <= 0:
+                return JsonResponse({"message":"INVALID_KEY"}, status=400)
+
+            return JsonResponse({"data" : tag_index.complete(prefix, limit)}, status=200)
+        except ValueError:
+            return JsonResponse({"message":"INVALID_KEY"}, status=400)
 
 class UserCardView(View):
     PHOTO_LIMIT = 3
@@ -383,16 +458,16 @@ class LikePhotoView(View):
 class RelatedPhotoBackColorView(View):
     def get(self, request, photo_id):
         try:
-            offset       = request.GET.get('offset', 0)
-            limit        = request.GET.get('limit', 20)
-            related_tags = list(HashTag.objects.filter(photo__id=photo_id).values_list('name', flat=True))
-            photos       = Photo.objects.filter(hashtag__name__in=related_tags).exclude(id=photo_id).distinct()
+            offset       = int(request.GET.get('offset', 0))
+            limit        = int(request.GET.get('limit', 20))
+            photo        = Photo.objects.get(id=photo_id)
+            photo_ids    = get_related_photos(photo.id)[offset*limit:(offset+1)*limit]
             data         = [{
                 "id"               : photo.id,
                 "background_color" : photo.background_color.name,
                 "width"            : photo.width,
                 "height"           : photo.height
-            } for photo in photos[offset*limit:(offset+1)*limit]]
+            } for photo in hydrate_photos(photo_ids, "background_color")]
             return JsonResponse({"data":data},status=200)
         except ValueError:
             return JsonResponse({"message":"VALUE_ERROR"},status=400)
@@ -403,15 +478,7 @@ class ModalCollectionView(View):
     @login_check
     def get(self, request, user_id, photo_id):
         try:
-            user_collection = Collection.objects.select_related('user').prefetch_related('photo_set').filter(user_id=user_id)
-            collection_list = [{
-                'collection_name' : collection_obj.name,
-                'first_image'     : collection_obj.photo_set.first().image if collection_obj.photo_set.exists() else False,
-                'photo_count'     : collection_obj.photo_set.count(),
-                'private_status'  : collection_obj.private,
-                'photo_exist'     : collection_obj.photo_set.filter(id=photo_id).exists()
-            } for collection_obj in user_collection]
-            return JsonResponse({'data':collection_list}, status=200)
+            return JsonResponse({'data':get_collection_list(user_id, photo_id)}, status=200)
         except Exception as e:
             return JsonResponse({'message':e}, status=400)
 
@@ -422,33 +489,29 @@ class AddCollectionView(View):
             data                 = json.loads(request.body)
             photo_id             = data['photo_id']
             collection_name      = data['collection_name']
-            user_pick_collection = Collection.objects.get(name=collection_name, user__id=user_id)
-            if PhotoCollection.objects.filter(photo_id=photo_id, collection_id=user_pick_collection.id).exists():
-                PhotoCollection.objects.filter(photo_id=photo_id, collection_id=user_pick_collection.id).delete()
-                user_collections = Collection.objects.filter(user_id=user_id)
-                collection_list  = [{
-                    'collection_name' : collection_obj.name,
-                    'first_image'     : collection_obj.photo_set.first().image if collection_obj.photo_set.exists() else False,
-                    'photo_count'     : collection_obj.photo_set.count(),
-                    'private_status'  : collection_obj.private,
-                    'photo_exist'     : PhotoCollection.objects.filter(photo_id=photo_id, collection_id=collection_obj.id).exists()
-                } for collection_obj in user_collections]
-                return JsonResponse({'data':collection_list}, status=200)
-            PhotoCollection.objects.create(
-                photo_id      = photo_id,
-                collection_id = user_pick_collection.id
-            )
-            user_collections = Collection.objects.filter(user_id=user_id)
-            collection_list  = [{
-                'collection_name' : collection_obj.name,
-                'first_image'     : collection_obj.photo_set.first().image if collection_obj.photo_set.exists() else False,
-                'photo_count'     : collection_obj.photo_set.count(),
-                'private_status'  : collection_obj.private,
-                'photo_exist'     : PhotoCollection.objects.filter(photo_id=photo_id, collection_id=collection_obj.id).exists()
-            } for collection_obj in user_collections]
-            return JsonResponse({'data':collection_list}, status=200)
+            delta                = data.get('delta', False)
+            user_pick_collection = Collection.objects.select_related('user').get(name=collection_name, user__id=user_id)
+            with transaction.atomic():
+                removed, _ = PhotoCollection.objects.filter(photo_id=photo_id, collection_id=user_pick_collection.id).delete()
+                if not removed:
+                    PhotoCollection.objects.create(
+                        photo_id      = photo_id,
+                        collection_id = user_pick_collection.id
+                    )
+            if user_pick_collection.user.user_name == CATEGORY_OWNER:
+                if removed:
+                    update_category_feed(collection_name, removed_ids=[photo_id])
+                else:
+                    update_category_feed(collection_name, added_ids=[photo_id])
+
+            if delta:
+                collection = Collection.objects.select_related('cover_photo').get(id=user_pick_collection.id)
+                return JsonResponse({'data':build_collection_summary(collection, not removed)}, status=200)
+            return JsonResponse({'data':get_collection_list(user_id, photo_id)}, status=200)
         except KeyError:
             return JsonResponse({'message':'KEY_ERROR'}, status=400)
+        except Collection.DoesNotExist:
+            return JsonResponse({'message':'NON_EXISTING_COLLECTION'}, status=401)
 
 class CreateCollectionView(View):
     @login_check
@@ -471,20 +534,174 @@ class CreateCollectionView(View):
                 photo_id = photo_id,
                 collection_id = collection.id
             )
-            user_collection  = Collection.objects.select_related('user').prefetch_related('photo_set').filter(user_id=user_id)
-            collection_list  = [{
-                'collection_name' : collection_obj.name,
-                'first_image'     : collection_obj.photo_set.first().image if collection_obj.photo_set.exists() else False,
-                'photo_count'     : collection_obj.photo_set.count(),
-                'private_status'  : collection_obj.private,
-                'photo_exist'     : collection_obj.photo_set.filter(id=photo_id).exists()
-            } for collection_obj in user_collection]
-            return JsonResponse({'data':collection_list}, status=200)
+            return JsonResponse({'data':get_collection_list(user_id, photo_id)}, status=200)
         except KeyError:
             return JsonResponse({'message':'KEY_ERROR'}, status=400)
 
 class SearchTagView(View):
+    LIMIT_NUM = 10
+
     def get(self, request):
-        tag = request.GET.get('search',None)
-        tags = list(HashTag.objects.filter(photo__hashtag__name = tag).values_list("name")[:10])
+        tag  = request.GET.get('search',None)
+        rank = request.GET.get('rank','count')
+        tags = [[name] for name in get_related_tags(tag, self.LIMIT_NUM, rank)]
         return JsonResponse({"data":tags},status=200)
+
+class ViewerStateView(View):
+    ID_LIMIT = 100
+
+    @login_check
+    def get(self, request, user_id):
+        try:
+            photo_ids = [int(photo_id) for photo_id in request.GET.get('ids', '').split(',') if photo_id]
+            if len(photo_ids) > self.ID_LIMIT:
+                return JsonResponse({"message":"TOO_MANY_IDS"}, status=400)
+
+            viewer_state = get_viewer_state(user_id, photo_ids)
+            data = [{
+                "id" : photo_id,
+                **viewer_state[photo_id]
+            } for photo_id in photo_ids]
+            return JsonResponse({"data":data}, status=200)
+        except ValueError:
+            return JsonResponse({"message":"VALUE_ERROR"}, status=400)
+
+class PhotoStatsView(View):
+    def get(self, request, photo_id):
+        try:
+            photo = Photo.objects.only('id', 'views', 'downloads').get(id=photo_id)
+            data  = {
+                "id"                 : photo.id,
+                "views"              : photo.views + view_counter.pending([photo.id])[photo.id],
+                "downloads"          : photo.downloads + download_counter.pending([photo.id])[photo.id],
+                "unique_downloaders" : downloader_counter.count(photo.id)
+            }
+            return JsonResponse({"data":data}, status=200)
+        except Photo.DoesNotExist:
+            return JsonResponse({"message":"NON_EXISTING_PHOTO"}, status=401)
+
+class DownloadView(View):
+    @login_check
+    def post(self, request, user_id, photo_id):
+        try:
+            photo = Photo.objects.only('id').get(id=photo_id)
+            downloader = f'user:{user_id}' if user_id else f'ip:{get_client_ip(request)}'
+            download_counter.incr(photo.id)
+            downloader_counter.add(photo.id, downloader)
+            return HttpResponse(status=200)
+        except Photo.DoesNotExist:
+            return JsonResponse({"message":"NON_EXISTING_PHOTO"}, status=401)
+
+class SimilarColorView(View):
+    PHOTO_LIMIT = 20
+
+    @login_check
+    def get(self, request, user_id):
+        try:
+            photo_id = request.GET.get('photo', None)
+            color    = request.GET.get('color', None)
+            limit    = min(int(request.GET.get('limit', self.PHOTO_LIMIT)), 100)
+            if limit <= 0:
+                return JsonResponse({"message":"INVALID_KEY"}, status=400)
+
+            if photo_id:
+                photo     = Photo.objects.select_related('background_color').get(id=photo_id)
+                photo_ids = similar_to_photo(photo, limit)
+            elif color:
+                photo_ids = similar_to_color(color, limit)
+            else:
+                return JsonResponse({"message":"KEY_ERROR"}, status=400)
+
+            viewer_state = get_viewer_state(user_id, photo_ids)
+            data = [{
+                **card,
+                **viewer_state[card['id']]
+            } for card in get_cards(photo_ids)]
+            return JsonResponse({"data":data}, status=200)
+        except Photo.DoesNotExist:
+            return JsonResponse({"message":"NON_EXISTING_PHOTO"}, status=401)
+        except ValueError:
+            return JsonResponse({"message":"VALUE_ERROR"}, status=400)
+
+class ManifestView(View):
+    @login_check
+    def get(self, request, user_id):
+        try:
+            category      = request.GET.get('category', None)
+            collection_id = request.GET.get('collection', None)
+            hashtag       = request.GET.get('search', None)
+
+            if category:
+                manifest = get_category_manifest(category)
+            elif collection_id:
+                collection = Collection.objects.get(id=collection_id)
+                if collection.private and collection.user_id != user_id:
+                    return JsonResponse({"message":"NON_EXISTING_COLLECTION"}, status=401)
+                manifest = get_collection_manifest(collection)
+            elif hashtag:
+                manifest = get_search_manifest(hashtag)
+            else:
+                return JsonResponse({"message":"KEY_ERROR"}, status=400)
+            return HttpResponse(manifest, content_type='application/json', status=200)
+        except Collection.DoesNotExist:
+            return JsonResponse({"message":"NON_EXISTING_COLLECTION"}, status=401)
+        except ValueError:
+            return JsonResponse({"message":"VALUE_ERROR"}, status=400)
+
+class BulkCollectionView(View):
+    PHOTO_LIMIT = 1000
+
+    @login_check
+    def post(self, request, user_id):
+        try:
+            data       = json.loads(request.body)
+            add_ids    = [int(photo_id) for photo_id in data.get('add', [])]
+            remove_ids = [int(photo_id) for photo_id in data.get('remove', [])]
+            if len(add_ids) + len(remove_ids) > self.PHOTO_LIMIT:
+                return JsonResponse({'message':'TOO_MANY_PHOTOS'}, status=400)
+            if set(add_ids) & set(remove_ids):
+                return JsonResponse({'message':'OVERLAPPING_PHOTOS'}, status=400)
+
+            collection = Collection.objects.select_related('user').get(name=data['collection_name'], user_id=user_id)
+            with transaction.atomic():
+                existing_photos = set(Photo.objects.filter(id__in=add_ids).values_list('id', flat=True))
+                members         = set(PhotoCollection.objects.filter(
+                    collection_id = collection.id,
+                    photo_id__in  = add_ids + remove_ids
+                ).values_list('photo_id', flat=True))
+
+                added_ids   = sorted({photo_id for photo_id in add_ids if photo_id in existing_photos and photo_id not in members})
+                removed_ids = sorted({photo_id for photo_id in remove_ids if photo_id in members})
+                PhotoCollection.objects.bulk_create([
+                    PhotoCollection(photo_id=photo_id, collection_id=collection.id) for photo_id in added_ids
+                ], ignore_conflicts=True)
+                if removed_ids:
+                    # Plain DELETE so the per-row post_delete summary/leaderboard handlers
+                    # don't run; both are refreshed once below.
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            f'DELETE FROM {PhotoCollection._meta.db_table} WHERE collection_id = %s AND photo_id IN ({", ".join(["%s"] * len(removed_ids))})',
+                            [collection.id, *removed_ids]
+                        )
+                if added_ids or removed_ids:
+                    refresh_summary(collection.id)
+
+            if added_ids or removed_ids:
+                refresh_leaderboard(collection.id)
+                if collection.user.user_name == CATEGORY_OWNER:
+                    update_category_feed(collection.name, added_ids, removed_ids)
+
+            results = [{
+                'id'     : photo_id,
+                'result' : 'ADDED' if photo_id in added_ids else 'ALREADY_IN_COLLECTION' if photo_id in members else 'NON_EXISTING_PHOTO'
+            } for photo_id in add_ids] + [{
+                'id'     : photo_id,
+                'result' : 'REMOVED' if photo_id in removed_ids else 'NOT_IN_COLLECTION'
+            } for photo_id in remove_ids]
+            return JsonResponse({'data':results}, status=200)
+        except KeyError:
+            return JsonResponse({'message':'KEY_ERROR'}, status=400)
+        except (TypeError, ValueError):
+            return JsonResponse({'message':'VALUE_ERROR'}, status=400)
+        except Collection.DoesNotExist:
+            return JsonResponse({'message':'NON_EXISTING_COLLECTION'}, status=401)